@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import os, re, hashlib
+from neardup import WORD_RE
+
+STOPWORDS = frozenset(open(os.path.join(os.path.dirname(__file__), "stopwords_en.txt")).read().split(","))
+SENT_BREAK_RE = re.compile(r"(?<=[.!?]) ")
+TERM_RE = re.compile(r"[a-z\-]{3,}")
+
+def _fold(text):
+    """Lower-case without changing length, so offsets found in the result index the original.
+    Returns (folded, exact) where exact says the result is plain str.lower()."""
+    low = text.lower()
+    if len(low) == len(text): return low, True
+    return "".join(l if len(l) == 1 else c for c, l in ((c, c.lower()) for c in text)), False
+
+class Doc:
+    """One article's text, analysed once and shared by every stage that looks at it.
+
+    `text` is whitespace-normalised and `lower` is the same string lower-cased with identical
+    offsets, so sentence spans and keyword hit offsets index either. Sentences, simhash words,
+    per-sentence terms and keyword hits are worked out on first use and then kept.
+    """
+    __slots__ = ("text", "lower", "exact", "n_chars", "title", "matcher", "_spans", "_words", "_terms", "_hits", "_title_hits")
+
+    def __init__(self, text, title="", matcher=None):
+        self.n_chars = len(text or "")
+        self.text = " ".join((text or "").split())
+        self.lower, self.exact = _fold(self.text)
+        self.title, self.matcher = title or "", matcher
+        self._spans = self._words = self._terms = self._hits = self._title_hits = None
+
+    def digest(self):
+        """sha256 of the normalised, lower-cased text (the stored content_hash)."""
+        return hashlib.sha256((self.lower if self.exact else self.text.lower()).encode("utf-8")).hexdigest()
+
+    @property
+    def spans(self):
+        """(start, end) of each sentence in text/lower."""
+        if self._spans is None:
+            spans, start = [], 0
+            for m in SENT_BREAK_RE.finditer(self.text):
+                spans.append((start, m.start())); start = m.end()
+            if start < len(self.text): spans.append((start, len(self.text)))
+            self._spans = spans
+        return self._spans
+
+    def sentences(self): return [self.text[s:e] for s, e in self.spans]
+
+    @property
+    def words(self):
+        """Alphanumeric word tokens of the whole text, as SimHash shingles them."""
+        if self._words is None: self._words = WORD_RE.findall(self.lower if self.exact else self.text.lower())
+        return self._words
+
+    @property
+    def terms(self):
+        """Per-sentence lists of content terms: 3+ letters or hyphens, stopwords removed."""
+        if self._terms is None:
+            low = self.lower
+            self._terms = [[w for w in TERM_RE.findall(low, s, e) if w not in STOPWORDS] for s, e in self.spans]
+        return self._terms
+
+    @property
+    def hits(self):
+        if self._hits is None: self._hits = self.matcher.scan_lower(self.lower)
+        return self._hits
+
+    @property
+    def title_hits(self):
+        if self._title_hits is None: self._title_hits = self.matcher.scan(self.title)
+        return self._title_hits
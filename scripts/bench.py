@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Offline benchmark: run the real crawler against a synthetic corpus served from localhost.
+
+Generates feeds and article pages, serves them with injectable latency and errors (optionally
+with stand-ins for the search and LLM endpoints), runs crawler.refresh() in a throwaway data dir
+and writes throughput per stage and whole-run peak memory (the crawler process and its extraction
+workers) to reports/bench-<timestamp>.json.
+
+  python scripts/bench.py --feeds 6 --per-feed 100 --latency-ms 40 --error-rate 0.02 --runs 2
+"""
+import os, sys, json, time, random, shutil, argparse, tempfile, threading, subprocess
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import crawler
+from metrics import METRICS
+
+FILLER = ("the a programme review contract budget team year department report capability industry plan delivery "
+          "process change pressure supplier cost time system risk approach evidence committee minister level").split()
+
+class Corpus:
+    """Deterministic synthetic feeds and articles; `dup_rate` of articles reuse an earlier body."""
+    def __init__(self, cfg, feeds=4, per_feed=50, paragraphs=8, dup_rate=0.1, seed=0):
+        self.feeds, self.per_feed, self.paragraphs, self.dup_rate, self.seed = feeds, per_feed, paragraphs, dup_rate, seed
+        kw = cfg.get("keywords", {})
+        self.terms = [t.lower() for t in kw.get("problems", []) + kw.get("solutions", [])] or ["procurement"]
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def body(self, i):
+        rnd = random.Random(self.seed * 1000003 + i)
+        if i >= self.per_feed and rnd.random() < self.dup_rate:
+            return self.body(rnd.randrange(i))  # same text under a different URL
+        paras = []
+        for _ in range(self.paragraphs):
+            sents = []
+            for _ in range(rnd.randint(3, 6)):
+                words = [rnd.choice(FILLER) for _ in range(rnd.randint(12, 24))]
+                words.insert(rnd.randrange(len(words)), rnd.choice(self.terms))
+                sents.append(" ".join(words).capitalize() + ".")
+            paras.append(" ".join(sents))
+        return paras
+
+    def article(self, i):
+        paras = "".join(f"<p>{p}</p>" for p in self.body(i))
+        return (f"<html><head><title>Article {i}</title></head><body><nav>Home | News | About</nav>"
+                f"<article><h1>Article {i}</h1>{paras}</article><footer>Synthetic corpus</footer></body></html>")
+
+    def feed(self, f, base):
+        items = "".join(f"<item><title>Story {f}-{j}: {self.terms[(f + j) % len(self.terms)]}</title>"
+                        f"<link>{base}/a/{f * self.per_feed + j}</link><guid>{base}/a/{f * self.per_feed + j}</guid>"
+                        f"<pubDate>{format_datetime(self.now - timedelta(hours=j))}</pubDate></item>"
+                        for j in range(self.per_feed))
+        return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed {f}</title>{items}</channel></rss>'
+
+def make_handler(corpus, hosts, latency_ms=0, jitter_ms=0, error_rate=0.0):
+    rnd = random.Random(corpus.seed)
+    lock = threading.Lock()
+    etag = f'"bench-{corpus.seed}"'
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send(self, status, body=b"", ctype="text/html; charset=utf-8", headers=()):
+            self.send_response(status)
+            for k, v in headers: self.send_header(k, v)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def delay_or_fail(self):
+            with lock: d, fail = latency_ms + rnd.uniform(0, jitter_ms), rnd.random() < error_rate
+            if d: time.sleep(d / 1000)
+            if fail: self.send(503, b"injected error", "text/plain"); return True
+            return False
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            base = f"http://{self.headers['Host']}"
+            if path.startswith("/feed/"):
+                if self.headers.get("If-None-Match") == etag: return self.send(304)
+                f = int(path.split("/")[2].split(".")[0])
+                return self.send(200, corpus.feed(f, base).encode(), "application/rss+xml", [("ETag", etag)])
+            if path.startswith("/a/"):
+                if self.delay_or_fail(): return
+                return self.send(200, corpus.article(int(path.split("/")[2])).encode())
+            if path.endswith("/search"):
+                if self.delay_or_fail(): return
+                q = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+                n = int(parse_qs(urlparse(self.path).query).get("count", ["10"])[0])
+                total = corpus.feeds * corpus.per_feed
+                start = sum(map(ord, q)) % total
+                vals = [{"name": f"Result {k}", "url": f"http://{hosts[k % len(hosts)]}/a/{k}", "snippet": q}
+                        for k in ((start + i) % total for i in range(n))]
+                return self.send(200, json.dumps({"webPages": {"value": vals}}).encode(), "application/json")
+            self.send(404, b"", "text/plain")
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if not urlparse(self.path).path.endswith("/chat/completions"): return self.send(404, b"", "text/plain")
+            if self.delay_or_fail(): return
+            words = json.loads(body)["messages"][0]["content"].split()[-40:]
+            out = "\n".join("- " + " ".join(words[i:i + 8]) for i in range(0, len(words), 8))
+            self.send(200, json.dumps({"choices": [{"message": {"content": out}}]}).encode(), "application/json")
+
+        def log_message(self, *args): pass
+
+    return Handler
+
+def serve(corpus, n_hosts, **inject):
+    """One server per emulated host (127.0.0.x share a port so per-host limits see distinct hosts)."""
+    addrs = [f"127.0.0.{i + 1}" for i in range(n_hosts)]
+    first = ThreadingHTTPServer((addrs[0], 0), None)
+    port = first.server_address[1]
+    servers = [first]
+    try:
+        servers += [ThreadingHTTPServer((a, port), None) for a in addrs[1:]]
+    except OSError:
+        addrs = addrs[:1]  # no 127/8 aliases on this platform: everything from one host
+    hosts = [f"{a}:{port}" for a in addrs]
+    for s in servers:
+        s.RequestHandlerClass = make_handler(corpus, hosts, **inject)
+        s.daemon_threads = True
+        threading.Thread(target=s.serve_forever, name="bench-http", daemon=True).start()
+    return servers, hosts
+
+def bench_config(cfg, hosts, n_feeds, args):
+    cfg = json.loads(json.dumps(cfg))
+    cfg["feeds"] = [{"name": f"Bench {f}", "url": f"http://{hosts[f % len(hosts)]}/feed/{f}.xml", "weight": 1.0}
+                    for f in range(n_feeds)]
+    cfg["social"] = {}  # snscrape talks to the live sites
+    cfg.setdefault("extract", {})["workers"] = args.extract_workers
+    if args.search: cfg.setdefault("search", {})["endpoint"] = f"http://{hosts[0]}/v7.0/search"
+    else: cfg["queries"] = []
+    return cfg
+
+def run_once(cfg, data_dir, reports_dir):
+    METRICS.reset()
+    t0 = time.perf_counter()
+    path = crawler.refresh(cfg, data_dir=data_dir, reports_dir=reports_dir)
+    wall = time.perf_counter() - t0
+    with open(path) as f: rep = json.load(f)
+    stages = {n: {"items": s["items"], "wall_s": s["wall_s"],
+                  "items_per_s": round(s["items"] / s["wall_s"], 1) if s["wall_s"] else None} for n, s in rep["stages"].items()}
+    return {"wall_s": round(wall, 3), "new_items": rep.get("new_items", 0),
+            "items_per_s": round(rep.get("new_items", 0) / wall, 1) if wall else None,
+            "peak_rss_mb": rep["peaks"].get("rss_mb"), "peak_worker_rss_mb": rep["peaks"].get("rss_mb:workers"),
+            "stages": stages, "report": rep}
+
+def git_head():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=crawler.BASE, capture_output=True, text=True).stdout.strip() or None
+    except OSError: return None
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--feeds", type=int, default=4)
+    ap.add_argument("--per-feed", type=int, default=50)
+    ap.add_argument("--paragraphs", type=int, default=8)
+    ap.add_argument("--dup-rate", type=float, default=0.1, help="share of articles that repeat an earlier body")
+    ap.add_argument("--hosts", type=int, default=4)
+    ap.add_argument("--latency-ms", type=float, default=20)
+    ap.add_argument("--jitter-ms", type=float, default=20)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    ap.add_argument("--extract-workers", type=int, default=0)
+    ap.add_argument("--search", action="store_true", help="serve a stand-in search API")
+    ap.add_argument("--llm", action="store_true", help="serve a stand-in chat completions API")
+    ap.add_argument("--runs", type=int, default=1, help="repeat against the same data dir; later runs are warm")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--keep", action="store_true", help="keep the temporary data dir")
+    ap.add_argument("--out", default=crawler.REPORTS_DIR)
+    args = ap.parse_args()
+
+    cfg = crawler.load_config()
+    corpus = Corpus(cfg, args.feeds, args.per_feed, args.paragraphs, args.dup_rate, args.seed)
+    servers, hosts = serve(corpus, args.hosts, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    cfg = bench_config(cfg, hosts, args.feeds, args)
+
+    for k in ("OPENAI_API_KEY", "OPENAI_BASE_URL", "BING_API_KEY", "BING_ENDPOINT"): os.environ.pop(k, None)
+    if args.llm: os.environ.update(OPENAI_API_KEY="bench", OPENAI_BASE_URL=f"http://{hosts[0]}/v1")
+    if args.search: os.environ["BING_API_KEY"] = "bench"
+
+    work = tempfile.mkdtemp(prefix="bench-")
+    data_dir, reports_dir = os.path.join(work, "data"), os.path.join(work, "reports")
+    os.makedirs(os.path.join(data_dir, "user_seed", "text"))
+    runs = []
+    try:
+        for i in range(args.runs):
+            print(f"run {i + 1}/{args.runs} against {len(hosts)} host(s)")
+            runs.append(run_once(json.loads(json.dumps(cfg)), data_dir, reports_dir))
+    finally:
+        for s in servers: s.shutdown()
+        if not args.keep: shutil.rmtree(work, ignore_errors=True)
+
+    out = {"started": datetime.now(timezone.utc).isoformat(), "git": git_head(), "python": sys.version.split()[0],
+           "params": {k: v for k, v in vars(args).items() if k not in ("out", "keep")},
+           "hosts": len(hosts), "articles": args.feeds * args.per_feed, "runs": runs}
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, "bench-" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json")
+    with open(path, "w") as f: json.dump(out, f, indent=2)
+    for i, r in enumerate(runs):
+        print(f"run {i + 1}: {r['new_items']} items in {r['wall_s']}s ({r['items_per_s']}/s), peak RSS {r['peak_rss_mb']} MB "
+              f"(+{r['peak_worker_rss_mb'] or 0} MB in extraction workers)")
+        for n, s in r["stages"].items():
+            print(f"  {n:<9} {s['items']:>6} items {s['wall_s']:>8}s  {s['items_per_s'] or '-':>8}/s")
+    print(f"Wrote {path}")
+    if args.keep: print(f"Data kept in {work}")
+
+if __name__ == "__main__":  # extraction workers are spawned and re-import this module
+    main()
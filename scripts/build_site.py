@@ -1,11 +1,135 @@
 #!/usr/bin/env python3
-import os, markdown
+import os, re, json, gzip, hashlib, markdown
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+try: import brotli
+except ImportError: brotli = None
+from store import ArticleStore
+from columns import ArticleTable
+from retention import YearArchive
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DATA_DIR = os.path.join(BASE, "data")
 SITE_DIR = os.path.join(BASE, "site")
+SHARD_DIR = os.path.join(SITE_DIR, "data")
 REPORTS_DIR = os.path.join(BASE, "reports")
 os.makedirs(SITE_DIR, exist_ok=True)
-for name in ('articles.json','themes.json'):
-    src=os.path.join(DATA_DIR,name); dst=os.path.join(SITE_DIR,name)
-    if os.path.exists(src):
-        with open(src,'rb') as s, open(dst,'wb') as d: d.write(s.read())
+os.makedirs(SHARD_DIR, exist_ok=True)
+
+# Precompressed variants and _headers only help on a host that serves them (Netlify, Cloudflare Pages);
+# GitHub Pages ignores both and compresses on the fly, so they're opt-in.
+PRECOMPRESS = os.environ.get("SITE_PRECOMPRESS", "") not in ("", "0")
+
+# Served from /data/: shard names change whenever their content does, the manifest must be revalidated
+HEADERS = """/data/articles-*
+  Cache-Control: public, max-age=31536000, immutable
+/data/search-*
+  Cache-Control: public, max-age=31536000, immutable
+/data/manifest.json
+  Cache-Control: no-cache
+"""
+
+def iter_articles():
+    """(shard key, article) newest first: live articles keyed by month, then archived years whole."""
+    dbpath = os.path.join(DATA_DIR, "articles.db")
+    src = os.path.join(DATA_DIR, "articles.json")
+    if os.path.exists(dbpath):
+        for a in ArticleStore(dbpath).iter_articles(): yield (a.get("date") or "")[:7] or "undated", a
+    elif os.path.exists(src):  # the database is not committed; articles.json holds the same live set
+        table = ArticleTable.from_json(src)
+        for a in table.iter_rows(table.order(newest_first=True)): yield (a.get("date") or "")[:7] or "undated", a
+    archive = YearArchive(os.path.join(DATA_DIR, "archive"))
+    for year in sorted(archive.index, reverse=True):
+        for a in archive.iter_year(year): yield year, a
+
+def write_once(path, payload):
+    if not os.path.exists(path):
+        with open(path + ".tmp", "wb") as f: f.write(payload)
+        os.replace(path + ".tmp", path)
+
+def write_hashed(prefix, obj):
+    """Write obj as content-hashed JSON (plus gzip/brotli variants with PRECOMPRESS); returns (file name, raw size)."""
+    payload = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    name = f"{prefix}.{hashlib.sha256(payload).hexdigest()[:12]}.json"
+    path = os.path.join(SHARD_DIR, name)
+    write_once(path, payload)
+    if not PRECOMPRESS: return name, len(payload)
+    if all(os.path.exists(path + ext) for ext in (".gz",) + ((".br",) if brotli else ())):
+        return name, len(payload)  # unchanged since an earlier build; skip recompressing
+    write_once(path + ".gz", gzip.compress(payload, 9, mtime=0))
+    if brotli: write_once(path + ".br", brotli.compress(payload, quality=11))
+    return name, len(payload)
+
+TOKEN_RE = re.compile(r"[a-z0-9&]+")
+
+class SearchIndex:
+    """Inverted index over one shard's title, source and tags, keyed by position in the shard.
+
+    Each shard gets its own, so an archived year's index is as write-once as its articles; the
+    dashboard adds the counts of the shards before it to map a hit to state.articles[i]. Postings
+    are ascending and stored as gaps to keep the numbers small.
+    """
+    def __init__(self):
+        self.tokens = defaultdict(list)
+        self.tags = defaultdict(list)
+        self.n = 0
+
+    def add(self, a):
+        doc = self.n; self.n += 1
+        text = " ".join([a.get("title") or "", a.get("source") or ""] + list(a.get("tags", [])))
+        for tok in sorted(set(TOKEN_RE.findall(text.lower()))): self.tokens[tok].append(doc)
+        for t in set(a.get("tags", [])): self.tags[t].append(doc)
+
+    @staticmethod
+    def gaps(post): return [d - (post[i-1] if i else 0) for i, d in enumerate(post)]
+
+    def write(self, key):
+        name, size = write_hashed(f"search-{key}", {"n": self.n,
+                                             "tokens": {k: self.gaps(v) for k, v in sorted(self.tokens.items())},
+                                             "tags": {k: self.gaps(v) for k, v in sorted(self.tags.items())}})
+        return {"file": name, "bytes": size}
+
+def write_shard(key, rows):
+    """One shard per month of live articles, or per archived year (`key` is 'YYYY-MM' or 'YYYY'),
+    with its search index."""
+    name, size = write_hashed(f"articles-{key}", rows)
+    index = SearchIndex()
+    for a in rows: index.add(a)
+    return {"month": key, "file": name, "count": len(rows), "bytes": size, "index": index.write(key)}
+
+def build_shards():
+    shards, tags = [], Counter()
+    month, rows = None, []
+    for m, a in iter_articles():
+        if m != month and rows:
+            shards.append(write_shard(month, rows)); rows = []
+        month = m
+        rows.append(a)
+        tags.update(a.get("tags", []))
+    if rows: shards.append(write_shard(month, rows))
+    manifest = {"updated": datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + "Z",
+                "total": sum(s["count"] for s in shards), "shards": shards,
+                "tags": [{"name": k, "count": v} for k, v in tags.most_common()]}
+    with open(os.path.join(SHARD_DIR, "manifest.json.tmp"), "w") as f: json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(SHARD_DIR, "manifest.json.tmp"), os.path.join(SHARD_DIR, "manifest.json"))
+    # shards from superseded builds are no longer referenced
+    live = {s["file"] for s in shards} | {s["index"]["file"] for s in shards}
+    for fn in os.listdir(SHARD_DIR):
+        if fn.startswith(("articles-", "search")) and fn.split(".json")[0] + ".json" not in live: os.remove(os.path.join(SHARD_DIR, fn))
+    if PRECOMPRESS:
+        with open(os.path.join(SITE_DIR, "_headers"), "w") as f: f.write(HEADERS)
+    return manifest
+
+def main():
+    for name in ('articles.json','themes.json'):
+        src=os.path.join(DATA_DIR,name); dst=os.path.join(SITE_DIR,name)
+        if os.path.exists(src):
+            with open(src,'rb') as s, open(dst,'wb') as d: d.write(s.read())
+    weekly=os.path.join(REPORTS_DIR,'weekly_summary.md')
+    if os.path.exists(weekly):
+        with open(weekly,'r') as f: html=markdown.markdown(f.read(),extensions=['tables'])
+        with open(os.path.join(SITE_DIR,'weekly.html'),'w') as f:
+            f.write(f'<!doctype html><meta charset="utf-8"><link rel="stylesheet" href="./styles.css"><a class="backlink" href="./index.html">← Back</a><main class="container card">{html}</main>')
+    return build_shards()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+import os, json
+from array import array
+from datetime import datetime, timezone, timedelta
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NO_DATE = -2**63
+# articles.json field order; rows are exported with their present fields in this order
+FIELDS = ("id", "title", "url", "source", "date", "summary", "base_score", "relevance_score", "tags", "solutions",
+          "content_hash", "simhash", "content_length")
+BIT = {f: 1 << i for i, f in enumerate(FIELDS)}
+MISSING = object()
+
+def iter_json_array(path, chunk=1 << 16, opener=open):
+    """Yield the elements of a top-level JSON array one at a time without loading the whole file."""
+    dec = json.JSONDecoder()
+    with opener(path, "rt") as f:
+        buf, pos, started = "", 0, False
+        while True:
+            more = f.read(chunk)
+            buf = buf[pos:] + more; pos = 0
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,": pos += 1
+                if not started:
+                    if pos == len(buf): break
+                    if buf[pos] != "[": raise ValueError(f"{path}: not a JSON array")
+                    started = True; pos += 1; continue
+                if pos < len(buf) and buf[pos] == "]": return
+                try: obj, end = dec.raw_decode(buf, pos)
+                except ValueError:
+                    if not more: raise
+                    break  # element continues in the next chunk
+                if end == len(buf) and more: break  # a number may be cut short at the chunk edge
+                yield obj; pos = end
+            if not more:
+                if started: raise ValueError(f"{path}: unterminated JSON array")
+                return
+
+def write_json_array(path, articles):
+    """Write articles in the articles.json layout (json.dump indent=2), atomically; returns the count."""
+    tmp = path + ".tmp"
+    n = 0
+    with open(tmp, "w") as f:
+        f.write("[")
+        for a in articles:
+            f.write(("," if n else "") + "\n  " + json.dumps(a, indent=2).replace("\n", "\n  "))
+            n += 1
+        f.write("\n]" if n else "]")
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return n
+
+class Vocab:
+    """Interned strings: each distinct value is stored once and referred to by its index."""
+    def __init__(self):
+        self.words, self.codes = [], {}
+
+    def code(self, s):
+        c = self.codes.get(s)
+        if c is None: c = self.codes[s] = len(self.words); self.words.append(s)
+        return c
+
+class HexColumn:
+    """Fixed-width hex digests packed as raw bytes; values that don't round-trip are kept as-is."""
+    def __init__(self, nbytes):
+        self.n, self.data, self.odd = nbytes, bytearray(), {}
+
+    def append(self, i, v):
+        if v is MISSING: self.data += bytes(self.n); return
+        try: raw = bytes.fromhex(v) if isinstance(v, str) and len(v) == 2 * self.n else None
+        except ValueError: raw = None
+        if raw is None or raw.hex() != v: self.odd[i] = v; raw = bytes(self.n)
+        self.data += raw
+
+    def get(self, i):
+        return self.odd[i] if i in self.odd else self.data[i * self.n:(i + 1) * self.n].hex()
+
+def encode_date(s):
+    """ISO timestamp -> microseconds since the epoch (naive taken as UTC), or None."""
+    try: dt = datetime.fromisoformat(s)
+    except (TypeError, ValueError): return None
+    if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+def decode_date(us): return (EPOCH + timedelta(microseconds=us)).isoformat()
+
+class ArticleTable:
+    """Column-per-field article archive: interned sources, tags and solutions, integer dates and
+    packed digests instead of one dict per article.
+
+    Rows convert back to the articles.json schema exactly (field order included); values the
+    compact columns can't reproduce, and fields outside FIELDS, are kept per row on the side.
+    """
+    def __init__(self):
+        self.n = 0
+        self.present = array("H")
+        self.ids, self.content_hash, self.simhash = HexColumn(16), HexColumn(32), HexColumn(8)
+        self.title, self.url, self.summary = [], [], []
+        self.sources, self.source = Vocab(), array("I")
+        self.date = array("q")
+        self.base_score, self.relevance_score = array("d"), array("d")
+        self.content_length = array("q")
+        self.themes, self.tag_codes, self.tag_ends = Vocab(), array("I"), array("I")
+        self.solution_vocab, self.solution_codes, self.solution_ends = Vocab(), array("I"), array("I")
+        self.odd = {}  # row -> {field: value} for anything kept verbatim
+
+    def __len__(self): return self.n
+
+    @classmethod
+    def from_articles(cls, articles):
+        t = cls()
+        for a in articles: t.append(a)
+        return t
+
+    @classmethod
+    def from_json(cls, path): return cls.from_articles(iter_json_array(path))
+
+    def _keep(self, i, field, value): self.odd.setdefault(i, {})[field] = value
+
+    def append(self, a):
+        i = self.n; self.n += 1
+        mask = 0
+        for f in FIELDS:
+            if f in a: mask |= BIT[f]
+        self.present.append(mask)
+        self.ids.append(i, a.get("id", MISSING))
+        self.content_hash.append(i, a.get("content_hash", MISSING))
+        self.simhash.append(i, a.get("simhash", MISSING))
+        self.title.append(a.get("title")); self.url.append(a.get("url")); self.summary.append(a.get("summary"))
+        src = a.get("source")
+        if not isinstance(src, str):
+            if "source" in a: self._keep(i, "source", src)
+            src = ""
+        self.source.append(self.sources.code(src))
+        d = a.get("date")
+        us = encode_date(d)
+        if "date" in a and (us is None or decode_date(us) != d): self._keep(i, "date", d)
+        self.date.append(NO_DATE if us is None else us)
+        for f, kind in (("base_score", float), ("relevance_score", float), ("content_length", int)):
+            v = a.get(f)
+            ok = type(v) is kind  # anything else (an int score, null) must come back unchanged
+            if not ok and f in a: self._keep(i, f, v)
+            getattr(self, f).append(v if ok else 0)
+        for f, vocab, codes, ends in (("tags", self.themes, self.tag_codes, self.tag_ends),
+                                      ("solutions", self.solution_vocab, self.solution_codes, self.solution_ends)):
+            v = a.get(f)
+            if isinstance(v, list) and all(isinstance(x, str) for x in v): codes.extend(vocab.code(x) for x in v)
+            elif f in a: self._keep(i, f, v)
+            ends.append(len(codes))
+        extra = {k: v for k, v in a.items() if k not in BIT}
+        if extra: self.odd.setdefault(i, {}).update(extra)
+
+    def _list(self, i, vocab, codes, ends):
+        return [vocab.words[c] for c in codes[(ends[i - 1] if i else 0):ends[i]]]
+
+    def row(self, i):
+        """Row i as an articles.json dict."""
+        mask, odd = self.present[i], self.odd.get(i, {})
+        out = {}
+        for f in FIELDS:
+            if not mask & BIT[f]: continue
+            if f in odd: out[f] = odd[f]; continue
+            if f == "id": out[f] = self.ids.get(i)
+            elif f == "content_hash": out[f] = self.content_hash.get(i)
+            elif f == "simhash": out[f] = self.simhash.get(i)
+            elif f == "source": out[f] = self.sources.words[self.source[i]]
+            elif f == "date": out[f] = decode_date(self.date[i])
+            elif f == "tags": out[f] = self._list(i, self.themes, self.tag_codes, self.tag_ends)
+            elif f == "solutions": out[f] = self._list(i, self.solution_vocab, self.solution_codes, self.solution_ends)
+            else: out[f] = getattr(self, f)[i]
+        for k, v in odd.items():
+            if k not in BIT: out[k] = v
+        return out
+
+    def order(self, newest_first=True):
+        """Row indices sorted by date (stable, so ties keep insertion order), as the store orders them."""
+        import numpy as np
+        dates = np.frombuffer(self.date, dtype=np.int64) if self.n else np.zeros(0, dtype=np.int64)
+        # ~d reverses the order without overflowing on NO_DATE, which then lands last, as "" does
+        return np.argsort(~dates if newest_first else dates, kind="stable")
+
+    def iter_rows(self, order=None):
+        for i in (range(self.n) if order is None else order): yield self.row(int(i))
+
+    def to_json(self, path, order=None): return write_json_array(path, self.iter_rows(order))
@@ -1,67 +1,52 @@
 #!/usr/bin/env python3
-import os, re, json, time, hashlib, argparse, subprocess
+import os, re, json, time, signal, hashlib, argparse, threading
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
-import feedparser, requests, yaml
-from bs4 import BeautifulSoup
-import trafilatura
-from dateutil import parser as dateparse
-from collections import Counter
+from matcher import KeywordMatcher
+from analysis import Doc
+from store import ArticleStore
+from metrics import METRICS
+# Everything heavier (requests, feedparser, trafilatura, scikit-learn, ...) is imported inside the
+# command that needs it, so `weekly`, `build` and --help don't pay for the crawl's dependencies.
 
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DATA_DIR = os.path.join(BASE, "data")
 REPORTS_DIR = os.path.join(BASE, "reports")
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.yaml")
-STOPWORDS = set(open(os.path.join(os.path.dirname(__file__), "stopwords_en.txt")).read().split(","))
 
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(REPORTS_DIR, exist_ok=True)
 os.makedirs(os.path.join(DATA_DIR, "user_seed", "text"), exist_ok=True)
 
-def load_config():
-    with open(CONFIG_PATH, "r") as f:
+def load_config(path=CONFIG_PATH):
+    import yaml
+    with open(path, "r") as f:
         return yaml.safe_load(f)
 
 def norm_text(s): return re.sub(r"\s+"," ",s or "").strip()
 
-def fetch_url(url, timeout=20):
-    try:
-        r = requests.get(url, timeout=timeout, headers={"User-Agent":"Mozilla/5.0 (defence-proc-monitor)"})
-        if r.status_code == 200: return r.text
-    except Exception: return None
-    return None
+BASE_KW = ["defence procurement","defense procurement","acquisition","tender","contracting","de&s","industrial base","nao","equipment plan","ssro","single source"]
 
-def extract_text(html, url):
-    if not html: return ""
-    try:
-        out = trafilatura.extract(html, url=url, include_comments=False, include_tables=False, no_fallback=False)
-        if out: return out
-    except Exception: pass
-    try:
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(["script","style","noscript"]): tag.decompose()
-        return soup.get_text(" ", strip=True)
-    except Exception: return ""
+def build_matcher(cfg):
+    kw=cfg.get("keywords",{})
+    return KeywordMatcher(BASE_KW + kw.get("problems",[]) + kw.get("solutions",[]) + cfg.get("exclude_terms",[]))
 
-def sim_hash(text): return hashlib.sha256(norm_text(text).lower().encode("utf-8")).hexdigest()
+def is_excluded(hits, cfg): return any(hits.has(t) for t in cfg.get("exclude_terms",[]))
 
-def score_article(meta, text, cfg):
-    title = (meta.get("title") or "").lower()
+def score_article(meta, doc, cfg):
     url = (meta.get("url") or "").lower()
     host = urlparse(url).hostname or ""
-    content = (text or "").lower()
-    n_chars = len(content)
+    hits, title_hits, n_chars = doc.hits, doc.title_hits, doc.n_chars
     score = 0.0
     for d in cfg.get("prefer_domains", []):
         if d in host: score += 0.08
-    base_kw = ["defence procurement","defense procurement","acquisition","tender","contracting","de&s","industrial base","nao","equipment plan","ssro","single source"]
-    for k in base_kw:
-        if k in title: score += 0.10
-        if k in content: score += 0.06
+    for k in BASE_KW:
+        if title_hits.has(k): score += 0.10
+        if hits.has(k): score += 0.06
     for k in cfg.get("keywords",{}).get("problems",[]): 
-        if k.lower() in content: score += 0.02
+        if hits.has(k): score += 0.02
     for k in cfg.get("keywords",{}).get("solutions",[]): 
-        if k.lower() in content: score += 0.02
+        if hits.has(k): score += 0.02
     if n_chars >= cfg.get("scoring",{}).get("min_chars",800): score += 0.10
     else: score -= 0.08
     rec_days = cfg.get("scoring",{}).get("prefer_recency_days",365)
@@ -71,48 +56,23 @@ def score_article(meta, text, cfg):
         score += (0.06 if age_days <= rec_days else -0.04)
     return max(-1.0, min(1.0, score))
 
-def tag_themes(text, cfg):
-    content = (text or "").lower()
+def tag_themes(hits, cfg):
     tags = set()
     for k in cfg.get("keywords",{}).get("problems",[]):
-        if k.lower() in content: tags.add(k)
+        if hits.has(k): tags.add(k)
     for k in cfg.get("keywords",{}).get("solutions",[]):
-        if k.lower() in content: tags.add(k)
+        if hits.has(k): tags.add(k)
     return sorted(tags)
 
-def extract_solutions(text):
-    sents = re.split(r'(?<=[.!?])\s+', text or "")
-    cues = ("should","must","we need to","recommend","propose","ought to","could","establish","adopt","create","introduce")
-    sols = [s.strip() for s in sents if any(c in s.lower() for c in cues) and 60 <= len(s) <= 280]
-    return sols[:10]
+SOLUTION_CUES = ("should","must","we need to","recommend","propose","ought to","could","establish","adopt","create","introduce")
 
-def simple_summary(text, n=5):
-    if not text: return ""
-    sents = re.split(r'(?<=[.!?])\s+', norm_text(text))
-    scored = []
-    for s in sents:
-        toks = [w for w in re.findall(r"[a-zA-Z\-]{3,}", s.lower()) if w not in STOPWORDS]
-        scored.append((len(set(toks)), s))
-    top = [s for _, s in sorted(scored, key=lambda x: x[0], reverse=True)[:n]]
-    order = {s:i for i,s in enumerate(sents)}
-    return " ".join(sorted(top, key=lambda s: order.get(s, 0)))
-
-def openai_summary(text, api_key, max_tokens=300):
-    try:
-        import requests
-        prompt = "Summarise in 5-7 bullets focusing on UK defence procurement problems and proposed solutions. Be specific.\\n\\n" + text[:12000]
-        headers={"Authorization":f"Bearer {api_key}","Content-Type":"application/json"}
-        body={"model":"gpt-4o-mini","temperature":0.3,"messages":[{"role":"user","content":prompt}],"max_tokens":max_tokens}
-        r = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=body, timeout=60)
-        if r.status_code==200: return r.json()["choices"][0]["message"]["content"].strip()
-    except Exception: return None
-    return None
-
-def fetch_feed(url):
-    try: return feedparser.parse(url).entries
-    except Exception: return []
+def extract_solutions(doc):
+    low = doc.lower
+    sols = [doc.text[s:e] for s, e in doc.spans if 60 <= e-s <= 280 and any(low.find(c, s, e) >= 0 for c in SOLUTION_CUES)]
+    return sols[:10]
 
 def clean_date(e):
+    from dateutil import parser as dateparse
     for k in ("published","updated","created"):
         if e.get(k):
             try: return dateparse.parse(e[k]).astimezone(timezone.utc)
@@ -124,46 +84,9 @@ def clean_date(e):
         except Exception: pass
     return datetime.now(timezone.utc)
 
-def bing_search(q, api_key, n=12):
-    try:
-        r = requests.get("https://api.bing.microsoft.com/v7.0/search",
-            params={"q":q,"count":n,"mkt":"en-GB","setLang":"EN"},
-            headers={"Ocp-Apim-Subscription-Key":api_key}, timeout=20)
-        if r.status_code==200:
-            js=r.json().get("webPages",{}).get("value",[])
-            return [{"name":w["name"],"url":w["url"],"snippet":w.get("snippet","")} for w in js]
-    except Exception: return []
-    return []
-
-def gather_social(cfg):
-    items=[]
-    try:
-        out=""
-        for q in cfg.get("social",{}).get("twitter_searches",[]):
-            out = subprocess.check_output(["snscrape","--max-results","30","twitter-search",q], text=True, timeout=60)
-            for line in out.splitlines():
-                try:
-                    js=json.loads(line)
-                    items.append({"title":f"Tweet by @{js.get('user',{}).get('username','unknown')}",
-                                  "url":js.get("url"),"source":"Twitter",
-                                  "date":dateparse.parse(js.get("date")).astimezone(timezone.utc),
-                                  "html":js.get("renderedContent")})
-                except Exception: pass
-        for q in cfg.get("social",{}).get("reddit_searches",[]):
-            out = subprocess.check_output(["snscrape","--max-results","50","reddit-search",q], text=True, timeout=60)
-            for line in out.splitlines():
-                try:
-                    js=json.loads(line)
-                    items.append({"title":js.get("title") or "Reddit post","url":js.get("url"),"source":"Reddit",
-                                  "date":dateparse.parse(js.get("date")).astimezone(timezone.utc),
-                                  "html":js.get("content") or js.get("selfText","")})
-                except Exception: pass
-    except Exception: pass
-    return items
-
-def load_user_seed():
-    urls_path=os.path.join(DATA_DIR,"user_seed","urls.txt")
-    texts_dir=os.path.join(DATA_DIR,"user_seed","text")
+def load_user_seed(data_dir=DATA_DIR):
+    urls_path=os.path.join(data_dir,"user_seed","urls.txt")
+    texts_dir=os.path.join(data_dir,"user_seed","text")
     urls=[]
     if os.path.exists(urls_path):
         with open(urls_path) as f: urls=[u.strip() for u in f if u.strip() and not u.strip().startswith("#")]
@@ -178,97 +101,396 @@ def bias_terms_from_user(texts, topk=25):
     from collections import Counter as C
     freq=C()
     for t in texts:
-        for w in re.findall(r"[a-zA-Z\-]{3,}", t.get("text","").lower()):
-            if w not in STOPWORDS: freq[w]+=1
+        for terms in Doc(t.get("text","")).terms: freq.update(terms)
     return [w for w,_ in freq.most_common(topk)]
 
-def main():
-    cfg=load_config()
-    openai_key=os.environ.get("OPENAI_API_KEY")
-    bing_key=os.environ.get("BING_API_KEY")
-
-    existing=[]
-    apath=os.path.join(DATA_DIR,"articles.json")
-    if os.path.exists(apath):
-        with open(apath,"r") as f:
-            try: existing=json.load(f)
-            except Exception: existing=[]
-    seen_urls={a["url"] for a in existing}
-    seen_hashes={a.get("content_hash") for a in existing if a.get("content_hash")}
+def rescore(store, model, weight, chunk=500):
+    """Re-blend every stored article's score with the current model, a chunk at a time."""
+    from relevance import blend
+    buf=[]; n=0
+    def run():
+        ps=model.score(buf)
+        # pin base_score on articles stored before it existed, or each rescore would re-blend a blend
+        bases=[a.get("base_score", a.get("relevance_score",0.0)) for a in buf]
+        store.update_fields([(a["id"], {"base_score": b, "relevance_score": blend(b, p, weight)})
+                             for a, b, p in zip(buf, bases, ps)])
+        buf.clear()
+    for a in store.iter_articles():
+        buf.append(a); n+=1
+        if len(buf)>=chunk: run()
+    if buf: run()
+    return n
 
-    seed_urls, seed_texts = load_user_seed()
-    boosted=set(bias_terms_from_user(seed_texts))
-    for term in boosted:
-        if term not in cfg["keywords"]["problems"] and term not in cfg["keywords"]["solutions"]:
-            cfg["keywords"]["problems"].append(term)
+# drops a retry can't change; anything else leaves a feed entry open to be offered again next run
+SETTLED_DROPS = {"excluded", "too short", "duplicate", "near duplicate", "robots.txt"}
+# the host, not the page: such URLs are deferred to a later run instead of dropped
+DEFERRED = {"host unavailable", "rate limited"}
 
-    new_items=[]
-    # Feeds
-    for feed in cfg.get("feeds",[]):
-        for e in fetch_feed(feed["url"]):
+def discover(cfg, store, kw_matcher, seed_urls, feed_cache, bing_key, journal, data_dir=DATA_DIR, hosts=None):
+    """Yield each new candidate once: URLs deferred by earlier runs, feeds, then web search, social and user seeds."""
+    from feeds import poll_feeds
+    from websearch import SearchCache, search_all, BING_ENDPOINT
+    from social import stream_social
+    queued=set()
+    def fresh(url):
+        if not url or url in queued: return False
+        if store.has_url(url):
+            feed_cache.settle(url)
+            if hosts is not None: hosts.settle(url)
+            METRICS.count("known urls skipped"); return False
+        if journal.finished(url):
+            METRICS.count("known urls skipped"); return False
+        queued.add(url); METRICS.count("candidates"); return True
+    for it in (hosts.deferred() if hosts is not None else []):
+        if fresh(it["url"]):
+            METRICS.count("deferred urls retried")
+            yield dict(it, date=datetime.fromisoformat(it["date"]), html=None)
+    fcfg=cfg.get("fetch",{})
+    for feed, entries in poll_feeds(cfg.get("feeds",[]), feed_cache, workers=fcfg.get("feed_workers",8), timeout=fcfg.get("timeout",20)):
+        for e in entries:
             link=e.get("link") or e.get("id")
-            if not link or link in seen_urls: continue
             title=norm_text(e.get("title") or "")
-            if any(t.lower() in (title.lower()+" "+link.lower()) for t in cfg.get("exclude_terms",[])): continue
-            dt=clean_date(e)
-            new_items.append({"title":title,"url":link,"source":feed.get("name"),"date":dt,"html":None})
+            if not link: continue
+            if is_excluded(kw_matcher.scan(title+" "+link), cfg):
+                feed_cache.settle(link); METRICS.drop("excluded"); continue
+            if not fresh(link): continue
+            yield {"title":title,"url":link,"source":feed.get("name"),"date":clean_date(e),"html":None}
     # Web search (optional)
     if bing_key:
-        for q in cfg.get("queries",[]):
-            for r in bing_search(q, bing_key, n=15):
-                link=r["url"]
-                if link in seen_urls: continue
-                new_items.append({"title":norm_text(r["name"]),"url":link,"source":urlparse(link).hostname,"date":datetime.now(timezone.utc),"html":None})
+        scfg=cfg.get("search",{})
+        search_cache=SearchCache(os.path.join(data_dir,"search_cache.json"), ttl=scfg.get("ttl_hours",20)*3600)
+        for r in search_all(cfg.get("queries",[]), bing_key, search_cache, n=scfg.get("count",15), workers=scfg.get("workers",4),
+                            endpoint=os.environ.get("BING_ENDPOINT") or scfg.get("endpoint",BING_ENDPOINT)):
+            if fresh(r["url"]):
+                yield {"title":norm_text(r["name"]),"url":r["url"],"source":urlparse(r["url"]).hostname,"date":datetime.now(timezone.utc),"html":None}
+        search_cache.save()
     # Social
-    new_items.extend(gather_social(cfg))
+    for it in stream_social(cfg):
+        if fresh(it["url"]): yield it
     # User seeds
     for u in seed_urls:
-        if u not in seen_urls:
-            new_items.append({"title":"", "url":u,"source":urlparse(u).hostname,"date":datetime.now(timezone.utc),"html":None})
-
-    processed=[]
-    for item in new_items:
-        html=item.get("html") or fetch_url(item["url"])
-        text=extract_text(html, item["url"])
-        if not text or len(text)<400: continue
-        ch=sim_hash(text)
-        if ch in seen_hashes: continue
-
-        summary = simple_summary(text, n=5)  # default; OpenAI optional
-        if openai_key:
-            o = openai_summary(text, openai_key) 
-            if o: summary=o
-
-        sc=score_article({"title":item["title"],"url":item["url"],"date":item["date"]}, text, cfg)
-        tags=tag_themes(text, cfg)
-        solutions=extract_solutions(text)
-
-        processed.append({
-            "id": hashlib.md5(item["url"].encode()).hexdigest(),
-            "title": item["title"] or text[:90]+"…",
+        if fresh(u): yield {"title":"", "url":u,"source":urlparse(u).hostname,"date":datetime.now(timezone.utc),"html":None}
+
+def open_store(data_dir=DATA_DIR):
+    """The article store, rebuilt or caught up from articles.json and data/archive when the database is missing or stale."""
+    from retention import YearArchive, restore_archived
+    store=ArticleStore(os.path.join(data_dir,"articles.db"))
+    store.import_json(os.path.join(data_dir,"articles.json"))
+    if os.path.exists(os.path.join(data_dir,"archive","index.json")): restore_archived(store, YearArchive(os.path.join(data_dir,"archive")))
+    return store
+
+def update_relevance(store, cfg, data_dir=DATA_DIR, force=False):
+    """Train the relevance model on new dashboard signals and, if it moved (or force), rescore the archive."""
+    from relevance import RelevanceModel, load_signals
+    model=RelevanceModel(os.path.join(data_dir,"relevance_model.npz"))
+    learned=model.update(*load_signals(os.path.join(data_dir,"user_signals.json")), store.get)
+    if learned: model.save()
+    if (learned or force) and model.ready:
+        print(f"Relevance model: {learned} new signals; rescored {rescore(store, model, cfg.get('relevance',{}).get('weight',0.5))} stored articles")
+    return model
+
+def export(store, cfg, data_dir=DATA_DIR):
+    """Write themes.json, archive cold years and export the live articles.json; returns (live, total)."""
+    from retention import YearArchive, archive_cold_years
+    themes={"updated":datetime.now(timezone.utc).replace(tzinfo=None).isoformat()+"Z",
+            "themes":[{"name":k,"count":v} for k,v in store.top("theme",50)],
+            "top_solutions":[{"text":k,"count":v} for k,v in store.top("solution",50)]}
+    # years wholly older than the hot window go to write-once archives; the live file keeps the rest
+    hot_days=cfg.get("retention",{}).get("hot_days",90)
+    for y in archive_cold_years(store, YearArchive(os.path.join(data_dir,"archive")), datetime.now(timezone.utc)-timedelta(days=hot_days)):
+        print(f"Archived {y} to data/archive")
+    live=store.export_json(os.path.join(data_dir,"articles.json"), store.iter_articles())
+    with open(os.path.join(data_dir,"themes.json"),"w") as f: json.dump(themes,f,indent=2)
+    return live, store.count()
+
+def refresh(cfg=None, data_dir=DATA_DIR, reports_dir=REPORTS_DIR, summariser=None):
+    """Crawl every source once through the streaming pipeline and update the store and live files.
+    A `summariser` passed in is shared with later commands: it is flushed here, not closed."""
+    from fetcher import fetch_many, HostBook
+    from feeds import FeedCache
+    from httpcache import DiskCache
+    from extraction import extract_many
+    from neardup import SimHashIndex, simhash
+    from concurrent.futures import wait as wait_futures
+    from llm import Summariser
+    from textrank import summarise_batch
+    from relevance import blend
+    from pipeline import Pipeline
+    from journal import Journal
+    cfg=cfg or load_config()
+    METRICS.start_sampler()
+    openai_key=os.environ.get("OPENAI_API_KEY")
+    bing_key=os.environ.get("BING_API_KEY")
+
+    store=open_store(data_dir)
+    run_hashes=set()
+    dcfg=cfg.get("dedupe",{})
+    rcfg=cfg.get("relevance",{})
+    model=update_relevance(store, cfg, data_dir)
+    near_index=SimHashIndex(os.path.join(data_dir,"simhash_index.json"), bands=dcfg.get("simhash_bands",8),
+                            max_distance=dcfg.get("simhash_distance",6))
+    if len(near_index) < store.count_simhashes():
+        for aid, sh in store.simhashes(): near_index.add(aid, int(sh,16))
+
+    seed_urls, seed_texts = load_user_seed(data_dir)
+    boosted=set(bias_terms_from_user(seed_texts))
+    for term in boosted:
+        if term not in cfg["keywords"]["problems"] and term not in cfg["keywords"]["solutions"]:
+            cfg["keywords"]["problems"].append(term)
+    kw_matcher=build_matcher(cfg)
+
+    fcfg=cfg.get("fetch",{}); xcfg=cfg.get("extract",{}); ccfg=cfg.get("cache",{}); pcfg=cfg.get("pipeline",{})
+    feed_cache=FeedCache(os.path.join(data_dir,"feed_cache.json"))
+    hosts=HostBook.from_config(cfg, data_dir)
+    http_cache=DiskCache(os.path.join(data_dir,"http_cache"), ttl=ccfg.get("ttl_hours",72)*3600,
+                         max_bytes=ccfg.get("max_mb",256)*1024*1024)
+    own_summariser=summariser is None
+    summariser=summariser or Summariser.from_config(cfg, openai_key, data_dir)
+    pending_summaries=[]; batch=[]; stored=[0]
+    journal=Journal(os.path.join(data_dir,"journal"))
+    if journal.resumed: print(f"Resuming: {journal.resumed} URLs already journaled")
+    METRICS.count("resumed urls", journal.resumed)
+
+    def drop(item, reason):
+        journal.mark(item["url"], "dropped", reason)
+        if reason in SETTLED_DROPS: settle(item["url"])
+        METRICS.drop(reason)
+        return None
+
+    def defer(item, reason):
+        journal.mark(item["url"], "deferred", reason)
+        hosts.defer(item["url"], {"title":item["title"], "url":item["url"], "source":item["source"],
+                                  "date":item["date"].isoformat(), "deferred_at":item.get("deferred_at")})
+        METRICS.count("deferred: "+reason)
+
+    def settle(url):
+        feed_cache.settle(url); hosts.settle(url)
+
+    def fetch(items):
+        def resumed(it):
+            text=journal.load_text(it["url"])
+            if text is not None: it["text"]=text
+            return text is not None
+        for it, html in fetch_many(items, workers=fcfg.get("workers",16), per_host=fcfg.get("per_host",4), timeout=fcfg.get("timeout",20),
+                                   key=lambda it: it["url"], cache=http_cache, have=lambda it: it.get("html"), skip=resumed,
+                                   hosts=hosts, retries=fcfg.get("retries",2), backoff=fcfg.get("backoff_s",1.0)):
+            if "text" not in it:
+                if not html:
+                    why=hosts.why(it["url"])
+                    if why in DEFERRED: defer(it, why)
+                    else: drop(it, why or "fetch failed")
+                    continue
+                it["html"]=html
+                journal.mark(it["url"], "fetched")
+            yield it
+
+    def extract(items):
+        for it, text in extract_many(items, workers=xcfg.get("workers",0), max_chars=xcfg.get("max_html_kb",2048)*1024,
+                                     timeout=xcfg.get("timeout",15), html=lambda it: None if "text" in it else it["html"]):
+            it["html"]=None
+            if "text" not in it:
+                it["text"]=text
+                if text: journal.save_text(it["url"], text)
+            yield it
+
+
+    def dedupe(item):
+        text=item["text"]
+        if not text or len(text)<400: return drop(item, "too short")
+        doc=item["doc"]=Doc(text, item["title"], kw_matcher); del item["text"]  # from here on stages read the doc
+        ch=doc.digest()
+        if ch in run_hashes or store.has_hash(ch): return drop(item, "duplicate")
+        sig=simhash(None, words=doc.words)
+        if near_index.near(sig) is not None: return drop(item, "near duplicate")
+        item["id"]=hashlib.md5(item["url"].encode()).hexdigest(); item["content_hash"]=ch; item["simhash"]=sig
+        run_hashes.add(ch); near_index.add(item["id"], sig)
+        return item
+
+    def enrich(item):
+        doc=item["doc"]
+        sc=score_article({"title":item["title"],"url":item["url"],"date":item["date"]}, doc, cfg)
+        article={
+            "id": item["id"],
+            "title": item["title"] or doc.text[:90]+"…",
             "url": item["url"],
             "source": item["source"],
             "date": item["date"].astimezone(timezone.utc).isoformat(),
-            "summary": summary,
-            "relevance_score": round(sc,3),
-            "tags": tags,
-            "solutions": solutions,
-            "content_hash": ch,
-            "content_length": len(text)
-        })
-
-    all_items = existing + processed
-    all_items.sort(key=lambda a: a.get("date",""), reverse=True)
-
-    theme_counts=Counter(); sol_counts=Counter()
-    for a in all_items:
-        for t in a.get("tags",[]): theme_counts[t]+=1
-        for s in a.get("solutions",[]): sol_counts[s]+=1
-
-    themes={"updated":datetime.datetime.utcnow().isoformat()+"Z",
-            "themes":[{"name":k,"count":v} for k,v in theme_counts.most_common(50)],
-            "top_solutions":[{"text":k,"count":v} for k,v in sol_counts.most_common(50)]}
-
-    with open(os.path.join(DATA_DIR,"articles.json"),"w") as f: json.dump(all_items,f,indent=2)
-    with open(os.path.join(DATA_DIR,"themes.json"),"w") as f: json.dump(themes,f,indent=2)
-    print(f"Processed {len(processed)} new items. Total stored: {len(all_items)}")
+            "summary": "",  # TextRank fills this in per persist batch; an LLM summary replaces it
+            "_doc": doc,
+            "base_score": round(sc,3),
+            "relevance_score": round(sc,3),  # blended with the relevance model per persist batch
+            "tags": tag_themes(doc.hits, cfg),
+            "solutions": extract_solutions(doc),
+            "content_hash": item["content_hash"],
+            "simhash": f"{item['simhash']:016x}",
+            "content_length": doc.n_chars
+        }
+        fut=summariser.submit(item["content_hash"], doc.text)
+        if fut: pending_summaries.append((article["id"], fut))
+        return article
+
+    persist_lock=threading.Lock()
+    def flush():
+        with persist_lock:
+            if not batch: return
+            for a, summary in zip(batch, summarise_batch([a.pop("_doc") for a in batch], n=5)):
+                a["summary"]=summary
+            ps=model.score(batch)
+            if ps is not None:
+                for a, p in zip(batch, ps): a["relevance_score"]=blend(a["base_score"], p, rcfg.get("weight",0.5))
+            stored[0]+=store.add(batch)
+            for a in batch: journal.mark(a["url"], "done"); settle(a["url"])
+            batch.clear()
+
+    def persist(article):
+        with persist_lock: batch.append(article); full=len(batch)>=pcfg.get("persist_batch",25)
+        if full: flush()
+
+    try:
+        (Pipeline(maxsize=pcfg.get("queue_size",64), metrics=METRICS)
+            .source("discover", lambda: discover(cfg, store, kw_matcher, seed_urls, feed_cache, bing_key, journal, data_dir, hosts))
+            .flow("fetch", fetch)
+            .flow("extract", extract)
+            .map("dedupe", dedupe)
+            .map("enrich", enrich, workers=pcfg.get("enrich_workers",1))
+            .sink("persist", persist)
+            .run())
+    except BaseException as e:
+        METRICS.stop_sampler()
+        METRICS.write(reports_dir, {"new_items": stored[0], "error": repr(e)})
+        raise
+    finally:
+        flush()
+        http_cache.save()
+        hosts.save()
+
+    t0=time.time()
+    # LLM summaries that aren't back by now are left to `summarise`; the TextRank one is already stored
+    wait_futures([f for _, f in pending_summaries], timeout=cfg.get("llm",{}).get("finish_wait_s",10))
+    store.update_fields([(aid, {"summary": fut.result()}) for aid, fut in pending_summaries
+                         if fut.done() and not fut.cancelled() and fut.result()])
+    summariser.close() if own_summariser else summariser.flush()
+    live, total=export(store, cfg, data_dir)
+    feed_cache.save()
+    near_index.save()
+    journal.finish()
+    METRICS.stage_span("finalise", t0, time.time(), total)
+    METRICS.stop_sampler()
+    report=METRICS.write(reports_dir, {"new_items": stored[0], "total_stored": total, "live": live})
+    print(f"Processed {stored[0]} new items. Total stored: {total} ({live} live)")
+    store.close()
+    return report
+
+def summarise(cfg=None, data_dir=DATA_DIR, days=30, summariser=None):
+    """Backfill LLM summaries for recent live articles that still carry only the TextRank one.
+
+    Summaries already in the summary cache are applied directly. The rest are re-fetched through the
+    HTTP cache (so pages from the last few days cost nothing) and sent under the usual rate and
+    token budget.
+    """
+    from fetcher import fetch_many, HostBook
+    from httpcache import DiskCache
+    from extraction import extract_many
+    from llm import Summariser
+    cfg=cfg or load_config()
+    fcfg=cfg.get("fetch",{}); xcfg=cfg.get("extract",{}); ccfg=cfg.get("cache",{})
+    store=open_store(data_dir)
+    own_summariser=summariser is None
+    summariser=summariser or Summariser.from_config(cfg, os.environ.get("OPENAI_API_KEY"), data_dir)
+    since=(datetime.now(timezone.utc)-timedelta(days=days)).isoformat()
+    updates, todo = [], []
+    for a in store.iter_articles(since=since):
+        key=a.get("content_hash")
+        cached=summariser.cached(key)
+        if cached:
+            if a.get("summary")!=cached: updates.append((a["id"], {"summary": cached}))
+        elif key and summariser.pool is not None: todo.append({"id":a["id"], "url":a["url"], "key":key})
+    pending=[]
+    if todo:
+        http_cache=DiskCache(os.path.join(data_dir,"http_cache"), ttl=ccfg.get("ttl_hours",72)*3600,
+                             max_bytes=ccfg.get("max_mb",256)*1024*1024)
+        hosts=HostBook.from_config(cfg, data_dir)
+        fetched=(dict(it, html=html) for it, html in fetch_many(todo, workers=fcfg.get("workers",16), per_host=fcfg.get("per_host",4),
+                                                                 timeout=fcfg.get("timeout",20), key=lambda it: it["url"], cache=http_cache,
+                                                                 hosts=hosts, retries=fcfg.get("retries",2), backoff=fcfg.get("backoff_s",1.0)))
+        for it, text in extract_many(fetched, workers=xcfg.get("workers",0), max_chars=xcfg.get("max_html_kb",2048)*1024,
+                                     timeout=xcfg.get("timeout",15)):
+            fut=summariser.submit(it["key"], Doc(text).text) if text else None
+            if fut: pending.append((it["id"], fut))
+        http_cache.save()
+        hosts.save()
+    updates+=[(aid, {"summary": fut.result()}) for aid, fut in pending if fut.result()]  # the backfill does wait
+    summariser.close() if own_summariser else summariser.flush()
+    store.update_fields(updates)
+    if updates: export(store, cfg, data_dir)
+    print(f"Summaries: {len(updates)} applied, {len(todo)-len(pending)} of {len(todo)} uncached articles skipped"
+          + ("" if summariser.pool is not None else " (no OPENAI_API_KEY)"))
+    store.close()
+    return len(updates)
+
+def weekly(cfg=None, data_dir=DATA_DIR, reports_dir=REPORTS_DIR):
+    from weekly import write_weekly
+    store=open_store(data_dir)
+    path=write_weekly(store, reports_dir)
+    store.close()
+    print(f"Weekly digest: {path}")
+    return path
+
+def rescore_all(cfg=None, data_dir=DATA_DIR):
+    cfg=cfg or load_config()
+    store=open_store(data_dir)
+    model=update_relevance(store, cfg, data_dir, force=True)
+    if model.ready: export(store, cfg, data_dir)
+    else: print("Relevance model needs at least one liked and one ignored article in data/user_signals.json")
+    store.close()
+
+def build():
+    import build_site
+    build_site.main()
+
+COMMANDS = {
+    "refresh": "crawl feeds, search, social and seeds into the store",
+    "summarise": "backfill LLM summaries for recent articles",
+    "weekly": "write the weekly digest to reports/",
+    "rescore": "retrain the relevance model from user_signals.json and rescore",
+    "build": "build the static site from the store",
+}
+
+def parse_args(argv=None):
+    ap=argparse.ArgumentParser(description="UK defence procurement monitor: crawl, summarise and report.")
+    ap.add_argument("--config", default=CONFIG_PATH)
+    sub=ap.add_subparsers(dest="command", metavar="command")
+    for name, help in COMMANDS.items():
+        p=sub.add_parser(name, help=help)
+        if name=="summarise": p.add_argument("--days", type=int, default=30, help="look back this many days (default 30)")
+    # pre-subcommand invocation, as the scheduled workflow still uses: --refresh --summarise --weekly
+    for name in ("refresh", "summarise", "weekly"):
+        ap.add_argument("--"+name, dest="legacy_"+name, action="store_true", help=argparse.SUPPRESS)
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args=parse_args(argv)
+    commands=[args.command] if args.command else [n for n in ("refresh","summarise","weekly") if getattr(args,"legacy_"+n)] or ["refresh"]
+    cfg=load_config(args.config) if set(commands) & {"refresh","summarise","rescore"} else None
+    summariser=None
+    if set(commands) & {"refresh","summarise"}:
+        # one Summariser for the whole invocation, so --refresh --summarise share a single llm.token_budget
+        from llm import Summariser
+        summariser=Summariser.from_config(cfg, os.environ.get("OPENAI_API_KEY"), DATA_DIR)
+    try:
+        for name in commands:
+            if name=="refresh": refresh(cfg, summariser=summariser)
+            elif name=="summarise": summarise(cfg, days=getattr(args,"days",30), summariser=summariser)
+            elif name=="weekly": weekly(cfg)
+            elif name=="rescore": rescore_all(cfg)
+            elif name=="build": build()
+    finally:
+        if summariser is not None: summariser.close()
+
+def _terminate(signum, frame):
+    # turn SIGTERM (runner timeout, kill) into an exception so refresh()'s cleanup gets to run
+    raise SystemExit(128 + signum)
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _terminate)
+    main()
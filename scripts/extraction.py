@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import os, time, signal, threading
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from bs4 import BeautifulSoup
+import trafilatura
+from metrics import METRICS
+
+class ExtractTimeout(BaseException):
+    # BaseException so the broad `except Exception` fallbacks in extract_text can't swallow it
+    pass
+
+def extract_text(html, url):
+    if not html: return ""
+    try:
+        out = trafilatura.extract(html, url=url, include_comments=False, include_tables=False, no_fallback=False)
+        if out: return out
+    except Exception: pass
+    try:
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(["script","style","noscript"]): tag.decompose()
+        return soup.get_text(" ", strip=True)
+    except Exception: return ""
+
+def _on_alarm(signum, frame): raise ExtractTimeout()
+
+def guarded_extract(html, url, max_chars=2_000_000, timeout=15):
+    """extract_text with a size cap on the input and a wall-clock limit on the work."""
+    if html and len(html) > max_chars: html = html[:max_chars]
+    # SIGALRM can only be handled on the main thread, which is where extract_many's workers run it
+    if not timeout or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        return extract_text(html, url)
+    old = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try: return extract_text(html, url)
+    except ExtractTimeout: return ""
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old)
+
+def _timed_extract(html, url, max_chars, timeout):
+    t0 = time.perf_counter()
+    text = guarded_extract(html, url, max_chars, timeout)
+    return text, time.perf_counter() - t0
+
+def _new_pool(workers):
+    # spawn rather than fork: the fetch stage may still have threads running
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+
+def extract_many(items, workers=0, max_chars=2_000_000, timeout=15, html=lambda it: it["html"], url=lambda it: it["url"]):
+    """Extract text across a process pool, yielding (item, text) as documents finish.
+
+    `items` is consumed lazily with at most two documents queued per worker. workers=0 means one
+    per CPU. Even a single worker is a separate process, so the time limit always applies. A
+    worker that dies (a parser segfault, the OOM killer) breaks the pool: it is replaced and the
+    documents that were in flight are rerun one at a time, so only the one that crashes it again
+    comes back empty.
+    """
+    workers = workers or os.cpu_count() or 1
+    src = iter(items)
+    inflight = {}
+    suspects = deque()
+    pool = _new_pool(workers)
+
+    def submit(it, alone):
+        nonlocal pool
+        try: fut = pool.submit(_timed_extract, html(it), url(it), max_chars, timeout)
+        except BrokenProcessPool:
+            pool.shutdown(wait=False); pool = _new_pool(workers)
+            fut = pool.submit(_timed_extract, html(it), url(it), max_chars, timeout)
+        inflight[fut] = (it, alone, pool)
+
+    try:
+        while True:
+            if suspects:
+                if not inflight: submit(suspects.popleft(), True)
+            else:
+                for it in src:
+                    if not html(it):
+                        yield it, ""; continue
+                    submit(it, False)
+                    if len(inflight) >= workers * 2: break
+            if not inflight: return
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                it, alone, p = inflight.pop(fut)
+                try: text, secs = fut.result()
+                except BrokenProcessPool:
+                    if p is pool: pool.shutdown(wait=False); pool = _new_pool(workers)
+                    if not alone:
+                        suspects.append(it); continue
+                    METRICS.count("extract crashes"); text, secs = "", 0.0
+                except Exception: text, secs = "", 0.0
+                METRICS.extract(secs)
+                yield it, text
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import os, json, time, threading
+from concurrent.futures import ThreadPoolExecutor
+import feedparser
+from fetcher import timed_get
+from metrics import METRICS
+
+OPEN_TTL = 7 * 86400  # how long an unsettled entry is offered after it leaves the feed document
+
+def entry_id(e): return e.get("id") or e.get("link")
+
+def _brief(e, now):
+    return {"id": entry_id(e), "link": e.get("link"), "title": e.get("title"),
+            "published": e.get("published") or e.get("updated") or e.get("created"), "first": now}
+
+class FeedCache:
+    """Per-feed HTTP validators (ETag/Last-Modified) and what became of each entry.
+
+    An entry is only `seen` once it is settled: stored, or dropped for a reason that won't change
+    on a retry. Until then it stays `open` and is offered again on every poll, a 304 included, so
+    a page that failed to fetch or a crawl that died part-way doesn't lose it.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.feeds = {}
+        self.by_link = {}  # link -> (feed url, entry id) for the entries offered this run
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f: self.feeds = json.load(f)
+            except Exception: self.feeds = {}
+
+    def get(self, url):
+        with self.lock: return dict(self.feeds.get(url, {}))
+
+    def put(self, url, state):
+        with self.lock: self.feeds[url] = state
+
+    def offered(self, url, entries):
+        with self.lock:
+            for e in entries:
+                if e.get("link"): self.by_link[e["link"]] = (url, entry_id(e))
+
+    def settle(self, link):
+        """Mark the entry behind `link` as seen; a no-op for URLs that didn't come from a feed."""
+        with self.lock:
+            url, eid = self.by_link.pop(link, (None, None))
+            st = self.feeds.get(url)
+            if st is None: return
+            st.get("open", {}).pop(eid, None)
+            if eid not in st.setdefault("seen", []): st["seen"].append(eid)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with self.lock:
+            with open(tmp, "w") as f: json.dump(self.feeds, f, indent=2)
+        os.replace(tmp, self.path)
+
+def poll_feed(url, cache, timeout=20):
+    """Return the entries not yet settled; a 304 costs one round trip and no parsing."""
+    state = cache.get(url)
+    now = time.time()
+    open_ = {k: v for k, v in state.get("open", {}).items() if v["first"] + OPEN_TTL > now}
+    headers = {}
+    if state.get("etag"): headers["If-None-Match"] = state["etag"]
+    if state.get("modified"): headers["If-Modified-Since"] = state["modified"]
+    try:
+        r = timed_get(url, headers=headers, timeout=timeout)
+    except Exception: r = None
+    if r is not None: METRICS.cache("feed", r.status_code == 304)
+    parsed = None
+    if r is not None and r.status_code == 200:  # 304 Not Modified, errors: the open entries are all there is
+        try:
+            parsed = feedparser.parse(r.content, response_headers={"content-location": url,
+                                                                   "content-type": r.headers.get("Content-Type", "")})
+        except Exception: parsed = None
+    if parsed is None:
+        entries = list(open_.values())
+        if len(open_) != len(state.get("open", {})): cache.put(url, dict(state, open=open_))
+    else:
+        seen = set(state.get("seen", []))
+        entries = [e for e in parsed.entries if entry_id(e) and entry_id(e) not in seen]
+        current = {entry_id(e) for e in entries}
+        entries += [b for k, b in open_.items() if k not in current]  # left the document but still unsettled
+        for e in entries:
+            if entry_id(e) not in open_: open_[entry_id(e)] = _brief(e, now)
+        # the feed document is a sliding window, so its current IDs are all `seen` needs to remember
+        cache.put(url, {"etag": r.headers.get("ETag"), "modified": r.headers.get("Last-Modified"),
+                        "seen": [entry_id(e) for e in parsed.entries if entry_id(e) in seen], "open": open_})
+    cache.offered(url, entries)
+    return entries
+
+def poll_feeds(feeds, cache, workers=8, timeout=20):
+    """Poll all configured feeds in parallel, yielding (feed, new_entries) in config order."""
+    if not feeds: return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(feeds))), thread_name_prefix="feed") as pool:
+        yield from zip(feeds, pool.map(lambda fd: poll_feed(fd["url"], cache, timeout), feeds))
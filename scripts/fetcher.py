@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+import os, json, time, heapq, random, threading
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import METRICS
+
+USER_AGENT = "Mozilla/5.0 (defence-proc-monitor)"
+ROBOTS_AGENT = "defence-proc-monitor"  # the product token robots.txt groups are matched against
+ROBOTS_TTL = 24 * 3600
+RETRY_STATUS = (429, 500, 502, 503, 504)
+_session = None
+_session_lock = threading.Lock()
+
+def get_session(pool_size=32):
+    """Process-wide pooled session; keep-alive connections are reused across hosts and threads."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            s.mount("http://", adapter); s.mount("https://", adapter)
+            s.headers.update({"User-Agent": USER_AGENT})
+            _session = s
+        return _session
+
+def host_of(url): return (urlparse(url).hostname or "").lower()
+
+def timed_get(url, **kw):
+    """session.get that records latency, bytes and status per host; raises like session.get."""
+    t0 = time.monotonic()
+    try: r = get_session().get(url, **kw)
+    except Exception as e:
+        METRICS.fetch(host_of(url), time.monotonic() - t0, 0, type(e).__name__); raise
+    METRICS.fetch(host_of(url), time.monotonic() - t0, len(r.content), r.status_code)
+    return r
+
+def retry_after(r, now):
+    """Seconds the response asks us to wait (Retry-After as seconds or an HTTP date), or None."""
+    v = (r.headers.get("Retry-After") or "").strip()
+    if not v: return None
+    if v.isdigit(): return float(v)
+    try: return max(0.0, parsedate_to_datetime(v).timestamp() - now)
+    except (TypeError, ValueError, OverflowError): return None
+
+class HostBook:
+    """What we know about each host, kept in host_state.json between runs.
+
+    Per host: smoothed latency and error rate, consecutive failures, a not-before time set by
+    429/Retry-After, the circuit breaker and a copy of robots.txt. `failures` connection errors,
+    timeouts or 5xx in a row open the breaker; while it is open the host's URLs are skipped
+    without a request. Once the cooldown has passed a single probe is let through: success closes
+    the breaker, failure reopens it for twice as long (up to `max_cooldown`).
+
+    URLs skipped because of their host are not failures of the page: the caller defers them here
+    and they are handed back by deferred() on later runs until settled, or for `forget_days`.
+    """
+    def __init__(self, path=None, failures=3, cooldown=900, max_cooldown=86400, max_wait=120, robots=True,
+                 min_timeout=5, forget_days=30):
+        self.path, self.failures, self.cooldown, self.max_cooldown = path, failures, cooldown, max_cooldown
+        self.max_wait, self.robots, self.min_timeout, self.forget = max_wait, robots, min_timeout, forget_days * 86400
+        self.lock = threading.Lock()
+        self.hosts = {}
+        self.parsers = {}
+        self.robot_locks = defaultdict(threading.Lock)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r") as f: self.hosts = json.load(f)
+            except Exception: self.hosts = {}
+
+    @classmethod
+    def from_config(cls, cfg, data_dir):
+        fcfg = cfg.get("fetch", {})
+        return cls(os.path.join(data_dir, "host_state.json"), failures=fcfg.get("breaker_failures", 3),
+                   cooldown=fcfg.get("breaker_cooldown_s", 900), max_cooldown=fcfg.get("breaker_max_cooldown_s", 86400),
+                   max_wait=fcfg.get("max_wait_s", 120), robots=fcfg.get("robots", True))
+
+    def _h(self, host):
+        h = self.hosts.get(host)
+        if h is None:
+            h = self.hosts[host] = {"latency_ms": None, "error_rate": 0.0, "fails": 0, "trips": 0,
+                                    "open_until": 0, "not_before": 0, "seen": 0}
+        return h
+
+    def state(self, host, now):
+        """'ok', 'wait' (not before some time this run), 'probe' (breaker half-open) or 'skip'."""
+        with self.lock:
+            h = self.hosts.get(host)
+            if h is None: return "ok"
+            if h["open_until"] > now or h["not_before"] - now > self.max_wait: return "skip"
+            if h["not_before"] > now: return "wait"
+            return "probe" if h["fails"] >= self.failures else "ok"
+
+    def ready_at(self, host):
+        with self.lock: return self.hosts.get(host, {}).get("not_before", 0)
+
+    def limit(self, host, per_host):
+        """Concurrent requests allowed against `host`: one while robots.txt is unknown, the breaker is
+        half-open, errors are frequent or robots.txt asks for a crawl delay."""
+        with self.lock:
+            h = self.hosts.get(host)
+            if h is None: return 1 if self.robots else per_host
+            if self.robots and h.get("robots", {}).get("at", 0) + ROBOTS_TTL < time.time(): return 1
+            if h["fails"] >= self.failures or h["error_rate"] > 0.25 or h.get("delay"): return 1
+            return per_host
+
+    def timeout(self, host, timeout):
+        """Shorter read/connect timeout for hosts we have seen answer quickly."""
+        with self.lock: ms = self.hosts.get(host, {}).get("latency_ms")
+        return timeout if ms is None else min(timeout, max(self.min_timeout, 6 * ms / 1000))
+
+    def success(self, host, seconds):
+        with self.lock:
+            h = self._h(host)
+            ms = seconds * 1000
+            h["latency_ms"] = ms if h["latency_ms"] is None else 0.8 * h["latency_ms"] + 0.2 * ms
+            h["error_rate"] *= 0.8
+            if h["fails"] >= self.failures: METRICS.count("breaker closed")
+            h["fails"] = h["trips"] = h["open_until"] = 0
+            h["seen"] = time.time()
+            if h.get("delay"): h["not_before"] = max(h["not_before"], time.time() + h["delay"])
+
+    def failure(self, host):
+        with self.lock:
+            h = self._h(host)
+            h["error_rate"] = 0.8 * h["error_rate"] + 0.2
+            h["fails"] += 1
+            h["seen"] = now = time.time()
+            if h["fails"] >= self.failures and h["open_until"] <= now:  # not again for requests already in flight
+                h["open_until"] = now + min(self.cooldown * 2 ** h["trips"], self.max_cooldown)
+                h["trips"] += 1
+                METRICS.count("breaker opened")
+
+    def throttle(self, host, seconds):
+        with self.lock:
+            h = self._h(host)
+            h["seen"] = now = time.time()
+            h["not_before"] = max(h["not_before"], now + seconds)
+
+    def allowed(self, url, timeout):
+        """robots.txt verdict for `url`, fetching the file at most once a day per host. None if it
+        could not be fetched (a network error or 5xx, which also counts against the host)."""
+        if not self.robots: return True
+        host = host_of(url)
+        with self.robot_locks[host]:
+            with self.lock: cached = self.hosts.get(host, {}).get("robots")
+            if cached is None or cached["at"] + ROBOTS_TTL < time.time():
+                p = urlparse(url)
+                t0 = time.monotonic()
+                try: r = timed_get(f"{p.scheme}://{p.netloc}/robots.txt", timeout=self.timeout(host, timeout))
+                except requests.RequestException:
+                    self.failure(host); return None
+                if r.status_code >= 500:
+                    self.failure(host); return None
+                # RFC 9309: any 4xx means there are no rules
+                text = r.text[:65536] if r.status_code == 200 else ""
+                self.success(host, time.monotonic() - t0)
+                cached = {"at": time.time(), "txt": text}
+                with self.lock: self.hosts[host]["robots"] = cached
+                self.parsers.pop(host, None)
+            rp = self.parsers.get(host)
+            if rp is None:
+                rp = self.parsers[host] = RobotFileParser()
+                rp.parse(cached["txt"].splitlines())
+                delay = rp.crawl_delay(ROBOTS_AGENT)
+                with self.lock: self.hosts[host]["delay"] = min(float(delay), 30.0) if delay else 0
+        return rp.can_fetch(ROBOTS_AGENT, url)
+
+    def defer(self, url, entry):
+        with self.lock:
+            d = self._h(host_of(url)).setdefault("deferred", {})
+            d[url] = dict(entry, deferred_at=entry.get("deferred_at") or time.time())
+
+    def deferred(self):
+        """Deferred entries whose host can be asked again; they stay here until settle()."""
+        now = time.time()
+        with self.lock: hosts = [h for h, v in self.hosts.items() if v.get("deferred")]
+        out = []
+        for host in hosts:
+            if self.state(host, now) == "skip": continue
+            with self.lock: out += [e for e in self.hosts[host]["deferred"].values() if e["deferred_at"] + self.forget > now]
+        return out
+
+    def settle(self, url):
+        with self.lock:
+            h = self.hosts.get(host_of(url))
+            if h and h.get("deferred"): h["deferred"].pop(url, None)
+
+    def why(self, url):
+        """Why `url` was not fetched, if it was the host or robots.txt rather than the page."""
+        host, now = host_of(url), time.time()
+        with self.lock:
+            h = self.hosts.get(host)
+            if h is None: return None
+            if h["open_until"] > now: return "host unavailable"
+            if h["not_before"] - now > self.max_wait: return "rate limited"
+        rp = self.parsers.get(host)
+        if rp is not None and not rp.can_fetch(ROBOTS_AGENT, url): return "robots.txt"
+        return None
+
+    def save(self):
+        if not self.path: return
+        tmp = self.path + ".tmp"
+        cutoff = time.time() - self.forget
+        with self.lock:
+            for v in self.hosts.values():
+                if v.get("deferred"): v["deferred"] = {u: e for u, e in v["deferred"].items() if e["deferred_at"] >= cutoff}
+            keep = {k: v for k, v in self.hosts.items() if v["seen"] >= cutoff or v["open_until"] > time.time() or v.get("deferred")}
+            with open(tmp, "w") as f: json.dump(keep, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+def _download(url, timeout, cache=None, hosts=None):
+    """One attempt at `url`: ('ok', html), ('retry', seconds or None) or ('fail', None)."""
+    host = host_of(url)
+    ok = hosts.allowed(url, timeout)
+    if ok is None: return "retry", None
+    if not ok:
+        METRICS.count("robots disallowed"); return "fail", None
+    t0 = time.monotonic()
+    try:
+        r = timed_get(url, timeout=hosts.timeout(host, timeout))
+    except requests.RequestException:
+        hosts.failure(host); return "retry", None
+    except Exception: return "fail", None
+    if r.status_code == 200:
+        hosts.success(host, time.monotonic() - t0)
+        if cache is not None: cache.put(url, r.text)
+        return "ok", r.text
+    wait_s = retry_after(r, time.time())
+    if r.status_code == 429 or (r.status_code == 503 and wait_s is not None):
+        hosts.throttle(host, wait_s if wait_s is not None else 5.0)  # throttling, not an outage
+        return "retry", wait_s
+    if r.status_code in RETRY_STATUS:
+        hosts.failure(host); return "retry", wait_s
+    hosts.success(host, time.monotonic() - t0)  # the host answered; this page just isn't there
+    return "fail", None
+
+def fetch_many(items, workers=16, per_host=4, timeout=20, key=lambda x: x, cache=None, have=lambda x: None, skip=lambda x: False,
+               hosts=None, retries=2, backoff=1.0):
+    """Fetch concurrently, yielding (item, html) as each completes, html None on failure.
+
+    `items` is consumed lazily. At most `workers` requests are in flight overall and at most
+    `per_host` against any single host (fewer where `hosts` says so); URLs for a saturated or
+    throttled host wait in a per-host queue instead of occupying a worker thread. Connection
+    errors, timeouts, 429 and 5xx are retried up to `retries` times after a jittered exponential
+    backoff or the server's Retry-After; a host whose breaker is open has its URLs returned
+    unfetched. Items whose body is already in hand (`have`) and cache hits are yielded straight
+    away and never count against the limits; items matching `skip` come back as (item, None)
+    without being looked up at all.
+    """
+    get_session(max(workers, 1))
+    hosts = hosts if hosts is not None else HostBook()
+    src = iter(items)
+    pending = defaultdict(deque)
+    active = defaultdict(int)
+    inflight = {}
+    later = []  # (ready time, seq, host, item, attempt) for retries
+    seq = 0
+    exhausted = False
+    backlog = 0
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="fetch") as pool:
+        while True:
+            # top up the per-host queues without reading the whole source into memory
+            while not exhausted and backlog < workers * 4:
+                try: item = next(src)
+                except StopIteration: exhausted = True; break
+                if skip(item):
+                    yield item, None; continue
+                hit = have(item) or (cache.get(key(item)) if cache is not None else None)
+                if hit is not None:
+                    yield item, hit; continue
+                pending[host_of(key(item))].append((item, 0)); backlog += 1
+            now = time.time()
+            while later and later[0][0] <= now:
+                _, _, host, item, attempt = heapq.heappop(later)
+                pending[host].appendleft((item, attempt)); backlog += 1
+            wake = later[0][0] if later else None
+            for host in list(pending):
+                q = pending[host]
+                st = hosts.state(host, now)
+                if st == "skip":
+                    METRICS.count("host skipped", len(q))
+                    while q:
+                        item, _ = q.popleft(); backlog -= 1
+                        yield item, None
+                elif st == "wait":
+                    t = hosts.ready_at(host)
+                    wake = t if wake is None else min(wake, t)
+                else:
+                    cap = 1 if st == "probe" else hosts.limit(host, per_host)
+                    while q and active[host] < cap and len(inflight) < workers:
+                        (item, attempt) = q.popleft(); backlog -= 1
+                        active[host] += 1
+                        inflight[pool.submit(_download, key(item), timeout, cache, hosts)] = (host, item, attempt)
+                if not q: del pending[host]
+            if not inflight:
+                if exhausted and not pending and not later: return
+                if wake is not None: time.sleep(max(0.0, min(wake - time.time(), 1.0)))
+                continue
+            done, _ = wait(inflight, timeout=None if wake is None else max(0.0, wake - time.time()), return_when=FIRST_COMPLETED)
+            for fut in done:
+                host, item, attempt = inflight.pop(fut)
+                active[host] -= 1
+                outcome, val = fut.result()
+                if outcome == "retry" and attempt < retries and hosts.state(host, time.time()) != "skip":
+                    delay = val if val is not None else backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                    METRICS.count("fetch retries")
+                    heapq.heappush(later, (time.time() + delay, seq, host, item, attempt + 1)); seq += 1
+                    continue
+                yield item, val if outcome == "ok" else None
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+import os, json, gzip, time, hashlib, threading
+from collections import Counter
+from metrics import METRICS
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+def canonical_url(url):
+    """Normalise a URL so trivially different spellings share one cache entry."""
+    p = urlsplit((url or "").strip())
+    scheme = p.scheme.lower()
+    host = (p.hostname or "").lower()
+    port = p.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    query = sorted((k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+                   if not k.lower().startswith(TRACKING_PARAMS))
+    return urlunsplit((scheme, netloc, p.path or "/", urlencode(query), ""))
+
+class DiskCache:
+    """Content-addressed response cache: URL keys point at gzip blobs named by the body's SHA-256.
+
+    Entries expire after `ttl` seconds and the least recently used ones are evicted once the
+    blobs exceed `max_bytes`. The index lives in memory and is written back by save().
+    """
+    def __init__(self, root, ttl=72*3600, max_bytes=256*1024*1024):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(root, "index.json")
+        self.entries = {}
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r") as f: self.entries = json.load(f)
+            except Exception: self.entries = {}
+        self.refs = Counter(); self.total = 0
+        for e in self.entries.values(): self._ref(e)
+
+    def _key(self, url): return hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()
+
+    def _blob(self, sha): return os.path.join(self.root, "blobs", sha[:2], sha + ".gz")
+
+    def get(self, url):
+        key = self._key(url)
+        with self.lock:
+            e = self.entries.get(key)
+            if not e or time.time() - e["ts"] > self.ttl:
+                METRICS.cache("http", False); return None
+            e["atime"] = time.time()
+        try:
+            with gzip.open(self._blob(e["sha"]), "rb") as f: body = f.read()
+        except OSError:
+            with self.lock:
+                if key in self.entries: self._drop(key)
+            METRICS.cache("http", False)
+            return None
+        METRICS.cache("http", True)
+        return body.decode("utf-8", errors="replace")
+
+    def put(self, url, text):
+        body = (text or "").encode("utf-8")
+        sha = hashlib.sha256(body).hexdigest()
+        path = self._blob(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f: f.write(body)
+            os.replace(tmp, path)
+        now = time.time()
+        with self.lock:
+            key = self._key(url)
+            if key in self.entries: self._drop(key)
+            self.entries[key] = {"url": canonical_url(url), "sha": sha, "ts": now, "atime": now,
+                                 "size": os.path.getsize(path)}
+            self._ref(self.entries[key])
+            if self.total > self.max_bytes: self._evict()
+
+    def _ref(self, e):
+        if not self.refs[e["sha"]]: self.total += e["size"]
+        self.refs[e["sha"]] += 1
+
+    def _drop(self, key):
+        e = self.entries.pop(key)
+        self.refs[e["sha"]] -= 1
+        if not self.refs[e["sha"]]:
+            del self.refs[e["sha"]]; self.total -= e["size"]
+
+    def _evict(self):
+        now = time.time()
+        for k in [k for k, e in self.entries.items() if now - e["ts"] > self.ttl]: self._drop(k)
+        if self.total > self.max_bytes:
+            for k, _ in sorted(self.entries.items(), key=lambda kv: kv[1]["atime"]):
+                if self.total <= self.max_bytes * 0.9: break
+                self._drop(k)
+
+    def save(self):
+        with self.lock:
+            self._evict()
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w") as f: json.dump(self.entries, f)
+            os.replace(tmp, self.index_path)
+            live = set(self.refs)
+        # drop blobs no longer referenced by any entry
+        blobs = os.path.join(self.root, "blobs")
+        for d in os.listdir(blobs):
+            for fn in os.listdir(os.path.join(blobs, d)):
+                if fn.endswith(".gz") and fn[:-3] not in live:
+                    try: os.remove(os.path.join(blobs, d, fn))
+                    except OSError: pass
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import os, json, gzip, shutil, hashlib, threading
+
+# stages a URL can reach, in order; "dropped" is terminal alongside "done"
+STAGES = ("fetched", "extracted", "done", "dropped")
+
+class Journal:
+    """Append-only per-URL progress log for the current crawl.
+
+    Every stage transition is appended to run.jsonl as it happens and extracted text is kept
+    beside it, so a run that dies part-way leaves enough behind for the next one to skip URLs
+    already finished and reuse text already extracted. finish() clears it after a clean run.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.text_dir = os.path.join(root, "text")
+        self.path = os.path.join(root, "run.jsonl")
+        self.lock = threading.Lock()
+        self.state = {}
+        os.makedirs(self.text_dir, exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    try: rec = json.loads(line)
+                    except ValueError: continue  # torn final line from a kill mid-write
+                    self.state[rec["url"]] = rec["stage"]
+        self.resumed = len(self.state)
+        self.f = open(self.path, "a")
+
+    def finished(self, url): return self.state.get(url) in ("done", "dropped")
+
+    def mark(self, url, stage, reason=None):
+        rec = {"url": url, "stage": stage}
+        if reason: rec["reason"] = reason
+        with self.lock:
+            self.state[url] = stage
+            self.f.write(json.dumps(rec) + "\n"); self.f.flush()
+
+    def _text_path(self, url): return os.path.join(self.text_dir, hashlib.md5(url.encode()).hexdigest() + ".txt.gz")
+
+    def save_text(self, url, text):
+        tmp = self._text_path(url) + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f: f.write(text)
+        os.replace(tmp, self._text_path(url))
+        self.mark(url, "extracted")
+
+    def load_text(self, url):
+        if self.state.get(url) != "extracted": return None
+        try:
+            with gzip.open(self._text_path(url), "rt", encoding="utf-8") as f: return f.read()
+        except OSError: return None
+
+    def finish(self):
+        with self.lock:
+            self.f.close()
+            shutil.rmtree(self.root, ignore_errors=True)
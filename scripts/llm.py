@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import os, json, time, threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from fetcher import get_session
+from metrics import METRICS
+
+PROMPT = "Summarise in 5-7 bullets focusing on UK defence procurement problems and proposed solutions. Be specific.\\n\\n"
+
+class RateLimiter:
+    """Spaces calls evenly so no more than `per_minute` start in any minute."""
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now: time.sleep(at - now)
+
+def openai_summary(text, api_key, base_url="https://api.openai.com/v1", model="gpt-4o-mini", max_tokens=300, timeout=60, retries=2):
+    prompt = PROMPT + text[:12000]
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    body = {"model": model, "temperature": 0.3, "messages": [{"role": "user", "content": prompt}], "max_tokens": max_tokens}
+    for attempt in range(retries + 1):
+        try:
+            r = get_session().post(base_url.rstrip("/") + "/chat/completions", headers=headers, json=body, timeout=timeout)
+            if r.status_code == 200: return r.json()["choices"][0]["message"]["content"].strip()
+            if r.status_code != 429 and r.status_code < 500: return None
+            try: delay = float(r.headers.get("Retry-After", ""))
+            except ValueError: delay = 2.0 * (attempt + 1)
+            time.sleep(min(delay, 30))
+        except Exception: return None
+    return None
+
+class Summariser:
+    """Runs LLM summaries in the background under a request-rate and token budget.
+
+    submit() returns immediately with a Future (or None when there is no key or the budget is
+    spent), so the crawl never waits on the endpoint. flush() drops whatever hasn't been sent yet
+    and hands its share of the budget back, so one Summariser (and one budget) can serve several
+    commands in a row; close() does the same and shuts the pool down.
+    Results are cached by content hash in `cache_path`, so text that reappears is never sent
+    twice; entries unused for `cache_days` are dropped and the file is only rewritten on change.
+    """
+    def __init__(self, api_key, cache_path, base_url="https://api.openai.com/v1", model="gpt-4o-mini", workers=4,
+                 requests_per_minute=60, token_budget=200000, max_tokens=300, timeout=60, cache_days=60):
+        self.api_key = api_key
+        self.cache_path = cache_path
+        self.base_url, self.model, self.max_tokens, self.timeout = base_url, model, max_tokens, timeout
+        self.limiter = RateLimiter(requests_per_minute)
+        self.budget = token_budget
+        self.lock = threading.Lock()
+        self.cache = {}  # content hash -> {"s": summary, "t": last used}
+        self.ttl = cache_days * 86400
+        self.dirty = self.closed = False
+        self.gen = 0  # bumped by flush(); queued requests from an earlier generation are dropped
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r") as f: self.cache = json.load(f)
+            except Exception: self.cache = {}
+        now = time.time()
+        for k, v in self.cache.items():
+            if isinstance(v, str): self.cache[k] = {"s": v, "t": now}; self.dirty = True  # older flat format
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="llm") if api_key else None
+
+    @classmethod
+    def from_config(cls, cfg, api_key, data_dir):
+        lcfg = cfg.get("llm", {})
+        return cls(api_key, os.path.join(data_dir, "summary_cache.json"),
+                   base_url=os.environ.get("OPENAI_BASE_URL") or lcfg.get("base_url", "https://api.openai.com/v1"),
+                   model=lcfg.get("model", "gpt-4o-mini"), workers=lcfg.get("workers", 4),
+                   requests_per_minute=lcfg.get("requests_per_minute", 60), token_budget=lcfg.get("token_budget", 200000),
+                   max_tokens=lcfg.get("max_tokens", 300), timeout=lcfg.get("timeout", 60),
+                   cache_days=lcfg.get("cache_days", 60))
+
+    def _hit(self, key):
+        e = self.cache.get(key)
+        if e is None: return None
+        now = time.time()
+        if now - e["t"] > 86400: e["t"] = now; self.dirty = True
+        return e["s"]
+
+    def cached(self, key):
+        with self.lock: return self._hit(key)
+
+    def submit(self, key, text):
+        with self.lock:
+            hit = self._hit(key)
+            METRICS.cache("summary", hit is not None)
+            if hit is not None:
+                f = Future(); f.set_result(hit); return f
+            if self.pool is None or self.closed: return None
+            # rough count: ~4 characters per prompt token plus the completion allowance
+            cost = (len(PROMPT) + min(len(text), 12000)) // 4 + self.max_tokens
+            if cost > self.budget: return None
+            self.budget -= cost
+            gen = self.gen
+        METRICS.count("llm requests")
+        return self.pool.submit(self._run, key, text, cost, gen)
+
+    def _stale(self, gen, cost):
+        with self.lock:
+            if gen == self.gen and not self.closed: return False
+            self.budget += cost
+        return True
+
+    def _run(self, key, text, cost, gen):
+        if self._stale(gen, cost): return None
+        self.limiter.wait()
+        if self._stale(gen, cost): return None
+        out = openai_summary(text, self.api_key, self.base_url, self.model, self.max_tokens, self.timeout)
+        if out:
+            with self.lock: self.cache[key] = {"s": out, "t": time.time()}; self.dirty = True
+        return out
+
+    def flush(self):
+        """Drop requests not yet sent (their articles keep the TextRank summary for the summarise
+        backfill to replace) and save the cache."""
+        with self.lock: self.gen += 1
+        self.save()
+
+    def close(self):
+        self.closed = True
+        if self.pool is not None: self.pool.shutdown(wait=False, cancel_futures=True)
+        self.save()
+
+    def save(self):
+        with self.lock:
+            cutoff = time.time() - self.ttl
+            stale = [k for k, v in self.cache.items() if v["t"] < cutoff]
+            for k in stale: del self.cache[k]
+            if not (self.dirty or stale): return
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w") as f: json.dump(self.cache, f)
+            os.replace(tmp, self.cache_path)
+            self.dirty = False
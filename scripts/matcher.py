@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+from collections import deque
+
+class Hits(dict):
+    """term (lower-cased) -> list of start offsets where it occurs."""
+    def count(self, term): return len(self.get(term.lower(), ()))
+    def has(self, term): return term.lower() in self
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lower-cased terms.
+
+    scan() walks the text once and reports every occurrence of every term, overlapping ones
+    included, so substring semantics match the old `k.lower() in text` checks.
+    """
+    def __init__(self, terms):
+        self.terms = sorted({t.lower() for t in terms if t})
+        goto = [{}]; out = [[]]
+        for ti, term in enumerate(self.terms):
+            node = 0
+            for ch in term:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto); goto[node][ch] = nxt; goto.append({}); out.append([])
+                node = nxt
+            out[node].append(ti)
+        fail = [0] * len(goto)
+        q = deque(goto[0].values())
+        while q:
+            node = q.popleft()
+            for ch, nxt in goto[node].items():
+                q.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]: f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != nxt else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self.goto, self.fail, self.out = goto, fail, out
+
+    def scan(self, text): return self.scan_lower((text or "").lower())
+
+    def scan_lower(self, lower):
+        """scan() for text that is already lower-cased."""
+        goto, fail, out, terms = self.goto, self.fail, self.out, self.terms
+        hits = Hits()
+        node = 0
+        for i, ch in enumerate(lower):
+            while node and ch not in goto[node]: node = fail[node]
+            node = goto[node].get(ch, 0)
+            for ti in out[node]:
+                term = terms[ti]
+                hits.setdefault(term, []).append(i - len(term) + 1)
+        return hits
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import os, json, time, threading
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+# upper bounds in milliseconds; the last bucket catches everything slower
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000)
+
+def histogram(values_ms, bounds=LATENCY_BUCKETS_MS):
+    h = Counter()
+    for v in values_ms: h[next((f"<={b}" for b in bounds if v <= b), f">{bounds[-1]}")] += 1
+    return {k: h[k] for k in [f"<={b}" for b in bounds] + [f">{bounds[-1]}"] if h[k]}
+
+def rss_mb():
+    """Resident set size of this process; falls back to the lifetime peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def children_rss_mb():
+    """Summed resident set size of this process's children (the extraction workers), or None
+    where /proc is missing."""
+    me, total = str(os.getpid()), 0
+    try: pids = [p for p in os.listdir("/proc") if p.isdigit()]
+    except OSError: return None
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f: fields = f.read().rsplit(")", 1)[1].split()
+            if fields[1] != me: continue
+            with open(f"/proc/{pid}/statm") as f: total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError): continue  # exited while we looked
+    return total / 2**20
+
+def percentiles(values):
+    if not values: return {}
+    v = sorted(values)
+    pick = lambda q: v[min(len(v) - 1, int(q * len(v)))]
+    return {"count": len(v), "p50": round(pick(0.5), 4), "p90": round(pick(0.9), 4), "p99": round(pick(0.99), 4),
+            "max": round(v[-1], 4), "total": round(sum(v), 4)}
+
+class Metrics:
+    """Thread-safe counters for one crawl run, dumped as a JSON report into reports/."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sampler = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.stages = defaultdict(lambda: {"start": None, "end": None, "busy": [], "items": 0})
+            self.hosts = defaultdict(lambda: {"latency_ms": [], "bytes": 0, "status": Counter()})
+            self.extract_times = []
+            self.drops = Counter()
+            self.caches = defaultdict(Counter)
+            self.counters = Counter()
+            self.peaks = {}
+
+    def stage_span(self, name, start, end, items):
+        with self.lock:
+            st = self.stages[name]
+            st["start"] = start if st["start"] is None else min(st["start"], start)
+            st["end"] = end if st["end"] is None else max(st["end"], end)
+            st["items"] += items
+
+    def stage_busy(self, name, seconds):
+        with self.lock: self.stages[name]["busy"].append(seconds)
+
+    def fetch(self, host, seconds, nbytes, status):
+        with self.lock:
+            h = self.hosts[host]
+            h["latency_ms"].append(seconds * 1000); h["bytes"] += nbytes; h["status"][str(status)] += 1
+
+    def extract(self, seconds):
+        with self.lock: self.extract_times.append(seconds)
+
+    def drop(self, reason):
+        with self.lock: self.drops[reason] += 1
+
+    def cache(self, name, hit):
+        with self.lock: self.caches[name]["hits" if hit else "misses"] += 1
+
+    def count(self, name, n=1):
+        with self.lock: self.counters[name] += n
+
+    def peak(self, name, value):
+        with self.lock: self.peaks[name] = max(self.peaks.get(name, value), value)
+
+    def start_sampler(self, interval=0.25):
+        """Sample RSS in the background: peaks rss_mb (this process) and rss_mb:workers (its
+        extraction worker processes together).
+
+        These are whole-process figures. The pipeline's stages run concurrently in one process,
+        so memory is not broken down per stage.
+        """
+        if self.sampler: return
+        stop = threading.Event()
+        def run():
+            while not stop.wait(interval):
+                self.peak("rss_mb", round(rss_mb(), 1))
+                workers = children_rss_mb()
+                if workers: self.peak("rss_mb:workers", round(workers, 1))
+        t = threading.Thread(target=run, name="metrics-sampler", daemon=True)
+        self.sampler = (stop, t); t.start()
+
+    def stop_sampler(self):
+        if not self.sampler: return
+        stop, t = self.sampler
+        stop.set(); t.join(); self.sampler = None
+
+    def report(self):
+        with self.lock:
+            stages = {n: {"wall_s": round((s["end"] or 0) - (s["start"] or 0), 3), "items": s["items"],
+                          "busy_s": percentiles(s["busy"])} for n, s in self.stages.items()}
+            hosts = {h: {"requests": len(v["latency_ms"]), "bytes": v["bytes"], "status": dict(v["status"]),
+                         "latency_ms": histogram(v["latency_ms"]),
+                         "p50_ms": percentiles(v["latency_ms"]).get("p50")} for h, v in sorted(self.hosts.items())}
+            caches = {n: {"hits": c["hits"], "misses": c["misses"], "hit_rate": round(c["hits"] / max(1, c["hits"] + c["misses"]), 3)}
+                      for n, c in self.caches.items()}
+            return {"started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+                    "wall_s": round(time.time() - self.started, 3),
+                    "stages": stages,
+                    "fetch": {"requests": sum(v["requests"] for v in hosts.values()),
+                              "bytes": sum(v["bytes"] for v in hosts.values()), "hosts": hosts},
+                    "extract_s": percentiles(self.extract_times),
+                    "drops": dict(self.drops.most_common()),
+                    "caches": caches,
+                    "counters": dict(self.counters),
+                    "peaks": dict(self.peaks)}
+
+    def write(self, reports_dir, extra=None):
+        os.makedirs(reports_dir, exist_ok=True)
+        rep = self.report()
+        if extra: rep.update(extra)
+        path = os.path.join(reports_dir, "run-" + datetime.fromtimestamp(self.started, timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json")
+        with open(path, "w") as f: json.dump(rep, f, indent=2)
+        return path
+
+METRICS = Metrics()
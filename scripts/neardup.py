@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+import os, re, json, hashlib
+from collections import Counter
+from itertools import combinations
+
+BITS = 64
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+def simhash(text, shingle=3, words=None):
+    """64-bit SimHash over word shingles; one changed boilerplate line only flips a few bits.
+    Pass `words` when the text has already been tokenised with WORD_RE."""
+    import numpy as np
+    if words is None: words = WORD_RE.findall((text or "").lower())
+    grams = Counter(" ".join(words[i:i+shingle]) for i in range(max(1, len(words) - shingle + 1)))
+    digests = b"".join(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest() for g in grams)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)  # (grams, 64), top bit first
+    w = np.fromiter(grams.values(), dtype=np.int64, count=len(grams))
+    v = w @ (2 * bits.astype(np.int64) - 1)  # per bit: weight of grams with it set minus weight without
+    return int.from_bytes(np.packbits(v > 0).tobytes(), "big")
+
+def hamming(a, b): return bin(a ^ b).count("1")
+
+class SimHashIndex:
+    """Permuted-table lookup over SimHash signatures (Manku et al., "Detecting near-duplicates for
+    web crawling").
+
+    The 64 bits are split into `bands` blocks. Two signatures within `max_distance` bits of each
+    other differ in at most that many blocks, so they agree exactly on some `bands - max_distance`
+    of them; there is one table per such combination of blocks, holding every signature's value on
+    those blocks as a sorted key. With the defaults (8 blocks, distance 6) that is 28 tables of
+    16-bit keys, so a lookup is 28 binary searches and compares against roughly 28/65536 of the
+    archive instead of a fixed fraction of it.
+
+    Only the signatures are saved; the tables are sorted numpy arrays rebuilt from them on load.
+    Signatures added since are kept in a short list that is scanned directly and folded into the
+    tables once it reaches REBUILD.
+    """
+    REBUILD = 1024
+
+    def __init__(self, path, bands=8, max_distance=6):
+        assert max_distance < bands, "max_distance must be below the band count for exact recall"
+        self.path = path
+        self.bands = bands
+        self.max_distance = max_distance
+        edges = [round(i * BITS / bands) for i in range(bands + 1)]
+        self.blocks = [(lo, hi - lo) for lo, hi in zip(edges, edges[1:])]  # (shift, width)
+        self.combos = list(combinations(range(bands), bands - max_distance))
+        self.sigs, self.recent = {}, []
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f: js = json.load(f)
+                self.sigs = {k: int(v, 16) for k, v in js["sigs"].items()}
+            except Exception: pass
+        self._build()
+        self.dirty = False
+
+    def _key(self, sig, combo, np=None):
+        """A signature's blocks in `combo`, concatenated; `sig` may be an int or a uint64 array."""
+        one = (lambda x: x) if np is None else np.uint64
+        k = 0 if np is None else np.zeros_like(sig)
+        for b in combo:
+            shift, width = self.blocks[b]
+            k = (k << one(width)) | ((sig >> one(shift)) & one((1 << width) - 1))
+        return k
+
+    def _build(self):
+        import numpy as np
+        self.ids = list(self.sigs)
+        arr = np.fromiter((self.sigs[a] for a in self.ids), dtype=np.uint64, count=len(self.ids))
+        self.tables = []
+        for combo in self.combos:
+            keys = self._key(arr, combo, np)
+            order = np.argsort(keys, kind="stable")
+            self.tables.append((keys[order], order))
+        self.recent = []
+
+    def near(self, sig):
+        """Return the id of a stored signature within max_distance of `sig`, or None."""
+        import numpy as np
+        for aid in self.recent:
+            if hamming(sig, self.sigs[aid]) <= self.max_distance: return aid
+        for combo, (keys, order) in zip(self.combos, self.tables):
+            k = np.uint64(self._key(sig, combo))
+            for i in order[np.searchsorted(keys, k, "left"):np.searchsorted(keys, k, "right")]:
+                aid = self.ids[i]
+                if hamming(sig, self.sigs[aid]) <= self.max_distance: return aid
+        return None
+
+    def add(self, aid, sig):
+        if aid in self.sigs: return
+        self.sigs[aid] = sig
+        self.recent.append(aid)
+        if len(self.recent) >= self.REBUILD: self._build()
+        self.dirty = True
+
+    def __len__(self): return len(self.sigs)
+
+    def save(self):
+        if not self.dirty: return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"sigs": {k: f"{v:016x}" for k, v in self.sigs.items()}}, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
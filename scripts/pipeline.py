@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+import time, queue, threading
+
+_END = object()
+
+class Aborted(Exception): pass
+
+class Pipeline:
+    """Linear chain of stages, each on its own thread(s), joined by bounded queues.
+
+    A full queue blocks the stage feeding it, so memory is bounded by the queue sizes rather than
+    by how many candidates discovery turns up. The first exception in any stage stops the rest
+    and is re-raised by run().
+
+      source(name, fn)       fn() -> iterable; starts the chain
+      flow(name, fn)         fn(iterable) -> iterable; one thread, free to keep its own pool busy
+      map(name, fn, workers) fn(item) -> item, or None to drop it
+      sink(name, fn)         fn(item); ends the chain
+    """
+    def __init__(self, maxsize=64, grace=10.0, metrics=None):
+        self.maxsize = maxsize
+        self.metrics = metrics
+        self.grace = grace
+        self.stages = []
+        self.abort = threading.Event()
+        self.error = None
+        self.lock = threading.Lock()
+
+    def source(self, name, fn): self.stages.append(("source", name, fn, 1)); return self
+    def flow(self, name, fn): self.stages.append(("flow", name, fn, 1)); return self
+    def map(self, name, fn, workers=1): self.stages.append(("map", name, fn, workers)); return self
+    def sink(self, name, fn): self.stages.append(("sink", name, fn, 1)); return self
+
+    def _put(self, q, item):
+        while not self.abort.is_set():
+            try: q.put(item, timeout=0.1); return
+            except queue.Full: pass
+        raise Aborted()
+
+    def _iter(self, q):
+        while True:
+            try: item = q.get(timeout=0.1)
+            except queue.Empty:
+                if self.abort.is_set(): raise Aborted()
+                continue
+            if item is _END:
+                q.put(_END)  # let sibling workers on the same queue see it too
+                return
+            yield item
+
+    def _timed(self, name, fn):
+        def timed(item):
+            t0 = time.perf_counter()
+            try: return fn(item)
+            finally: self.metrics.stage_busy(name, time.perf_counter() - t0)
+        return timed
+
+    def _fail(self, exc):
+        with self.lock:
+            if self.error is None: self.error = exc
+        self.abort.set()
+
+    def run(self):
+        queues = [queue.Queue(self.maxsize) for _ in self.stages[:-1]]
+        threads = []
+        for i, (kind, name, fn, workers) in enumerate(self.stages):
+            inq = queues[i-1] if i else None
+            outq = queues[i] if i < len(queues) else None
+            left = [workers]
+            def body(kind=kind, name=name, fn=fn, inq=inq, outq=outq, left=left):
+                start, n = time.time(), 0
+                if self.metrics and kind in ("map", "sink"): fn = self._timed(name, fn)
+                try:
+                    if kind == "source": out = fn()
+                    elif kind == "flow": out = fn(self._iter(inq))
+                    elif kind == "map": out = (r for r in map(fn, self._iter(inq)) if r is not None)
+                    else:
+                        for item in self._iter(inq): fn(item); n += 1
+                        return
+                    for item in out: self._put(outq, item); n += 1
+                    with self.lock:
+                        left[0] -= 1
+                        last = left[0] == 0
+                    if last: self._put(outq, _END)
+                except Aborted: pass
+                except BaseException as e: self._fail(e)
+                finally:
+                    if self.metrics: self.metrics.stage_span(name, start, time.time(), n)
+            for w in range(workers):
+                t = threading.Thread(target=body, name=f"{name}-{w}", daemon=True)
+                threads.append(t); t.start()
+        try:
+            for t in threads:
+                while t.is_alive() and not self.abort.is_set(): t.join(0.2)
+        except BaseException as e:
+            self._fail(e)
+        if self.error is not None:
+            # let stages notice the abort and finish the item in hand, so nothing is half-written
+            # when the caller cleans up; anything stuck in network I/O is a daemon thread
+            deadline = time.monotonic() + self.grace
+            for t in threads: t.join(max(0.0, deadline - time.monotonic()))
+            raise self.error
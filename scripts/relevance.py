@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import os, json
+from urllib.parse import urlparse
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+def features(article):
+    """Text for the hashed features, built only from fields kept in the store so stored and
+    freshly crawled articles are described the same way."""
+    host = (urlparse(article.get("url") or "").hostname or "").lower()
+    return " ".join([article.get("title") or "", article.get("summary") or "", f"src_{host.replace('.', '_')}"]
+                    + [f"tag_{t.lower().replace(' ', '_')}" for t in article.get("tags", [])])
+
+def load_signals(path):
+    try:
+        with open(path, "r") as f: js = json.load(f)
+    except (OSError, ValueError): return [], []
+    return list(js.get("liked_ids", [])), list(js.get("ignored_ids", []))
+
+class RelevanceModel:
+    """Logistic model over hashed title/summary/source/tag features, learned from dashboard likes.
+
+    update() calls partial_fit on signals it has not seen before, so the model never retrains over
+    the archive. Until both a like and an ignore have been seen it has nothing to separate and
+    score() returns None, leaving the heuristic score alone.
+
+    Only the weights, the SGD step count and the signal ids are saved (a compressed .npz, not a
+    pickle of the estimator), which is all partial_fit needs to carry on where it left off.
+    """
+    def __init__(self, path, n_features=2**16, epochs=5):
+        self.path, self.epochs = path, epochs
+        self.vec = HashingVectorizer(n_features=n_features, ngram_range=(1, 2), alternate_sign=False,
+                                     token_pattern=r"[a-zA-Z0-9_&\-]{2,}")
+        self.clf = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=0)
+        self.seen, self.counts = set(), [0, 0]
+        if os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as st:
+                    if st["coef"].shape == (1, n_features):
+                        self.clf.coef_, self.clf.intercept_, self.clf.t_ = st["coef"], st["intercept"], float(st["t"])
+                        self.clf.classes_, self.clf.n_features_in_ = np.array([0, 1]), n_features
+                        self.seen, self.counts = set(st["seen"].tolist()), st["counts"].tolist()
+            except Exception: pass
+
+    @property
+    def ready(self): return min(self.counts) > 0
+
+    def update(self, liked, ignored, lookup):
+        """Train on signals not seen before; `lookup(id)` returns the stored article or None."""
+        todo = [(aid, 1) for aid in liked if aid not in self.seen] + [(aid, 0) for aid in ignored if aid not in self.seen]
+        docs = [(lookup(aid), y, aid) for aid, y in todo]
+        docs = [(a, y, aid) for a, y, aid in docs if a]
+        if not docs: return 0
+        X = self.vec.transform([features(a) for a, _, _ in docs])
+        y = np.array([y for _, y, _ in docs])
+        for _ in range(self.epochs):  # a few passes over just the new signals; one is too timid for a handful
+            self.clf.partial_fit(X, y, classes=np.array([0, 1]))
+        for _, label, aid in docs:
+            self.seen.add(aid); self.counts[label] += 1
+        return len(docs)
+
+    def score(self, articles):
+        """P(liked) for each article in one call, or None while the model is untrained."""
+        if not self.ready or not articles: return None
+        return self.clf.predict_proba(self.vec.transform([features(a) for a in articles]))[:, 1]
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, coef=self.clf.coef_, intercept=self.clf.intercept_, t=self.clf.t_,
+                                seen=np.array(sorted(self.seen), dtype=str), counts=np.array(self.counts))
+        os.replace(tmp, self.path)
+
+def blend(base, p, weight):
+    """Mix the heuristic score (-1..1) with the model's P(liked), mapped onto the same range."""
+    return round(max(-1.0, min(1.0, (1 - weight) * base + weight * (2 * p - 1))), 3)
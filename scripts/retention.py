@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+import os, gzip, json, hashlib
+from columns import iter_json_array
+
+class YearArchive:
+    """Write-once, gzip-compressed per-year article files under `root`, listed in index.json.
+
+    A year is archived once every day of it is older than the hot window. Its file is never
+    rewritten, so a daily commit only touches the live files; articles that turn up late for an
+    archived year stay live instead. The store then keeps only their dedupe keys, so these files
+    and articles.json are the whole record.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        os.makedirs(root, exist_ok=True)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f: self.index = {e["year"]: e for e in json.load(f)["years"]}
+
+    def path(self, year): return os.path.join(self.root, self.index[year]["file"])
+
+    def iter_year(self, year):
+        """Stream one archived year's articles, newest first."""
+        yield from iter_json_array(self.path(year), opener=gzip.open)
+
+    def write_year(self, year, table):
+        """Archive a year's articles (an ArticleTable, newest first) and return their ids."""
+        if year in self.index: raise FileExistsError(f"{year} is already archived")
+        lines, ids = [], []
+        for a in table.iter_rows():
+            lines.append(json.dumps(a, separators=(",", ":"))); ids.append(a["id"])
+        payload = ("[\n" + ",\n".join(lines) + "\n]\n").encode("utf-8")
+        name = f"articles-{year}.json.gz"
+        tmp = os.path.join(self.root, name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(payload, 9, mtime=0)); f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.root, name))
+        self.index[year] = {"year": year, "file": name, "count": len(ids), "sha256": hashlib.sha256(payload).hexdigest()}
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f: json.dump({"years": [self.index[y] for y in sorted(self.index)]}, f, indent=2)
+        os.replace(tmp, self.index_path)
+        return ids
+
+def restore_archived(store, archive):
+    """Give a rebuilt store the dedupe keys and counts of every archived year it doesn't know."""
+    known = set(store.archived_years())
+    for y in sorted(set(archive.index) - known): store.import_archived(y, archive.iter_year(y))
+
+def archive_cold_years(store, archive, cutoff):
+    """Move every year that ends before `cutoff` (an aware datetime) out of the live set."""
+    first = store.oldest_live_date() or ""
+    if not first[:4].isdigit(): return []
+    done = set(store.archived_years()) | set(archive.index)
+    years = []
+    for y in map(str, range(int(first[:4]), cutoff.year)):
+        if y in done: continue
+        table = store.table(since=y, until=str(int(y) + 1))
+        if not len(table): continue
+        store.archive(archive.write_year(y, table), y)
+        years.append(y)
+    return years
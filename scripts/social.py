@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import json, queue, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+from dateutil import parser as dateparse
+
+def parse_tweet(js):
+    return {"title":f"Tweet by @{js.get('user',{}).get('username','unknown')}",
+            "url":js.get("url"),"source":"Twitter",
+            "date":dateparse.parse(js.get("date")).astimezone(timezone.utc),
+            "html":js.get("renderedContent")}
+
+def parse_reddit(js):
+    return {"title":js.get("title") or "Reddit post","url":js.get("url"),"source":"Reddit",
+            "date":dateparse.parse(js.get("date")).astimezone(timezone.utc),
+            "html":js.get("content") or js.get("selfText","")}
+
+# config key -> (snscrape scraper, default max results, line parser)
+SOURCES = {"twitter_searches": ("twitter-search", 30, parse_tweet),
+           "reddit_searches": ("reddit-search", 50, parse_reddit)}
+
+def run_search(scraper, q, max_results, parse, emit, timeout=60):
+    """Stream one snscrape search, handing each parsed item to `emit` as its line arrives.
+
+    The process is killed after `timeout` seconds; whatever was read by then is kept. Errors stay
+    inside this query.
+    """
+    try:
+        proc = subprocess.Popen(["snscrape","--jsonl","--max-results",str(max_results),scraper,q],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except OSError: return
+    killer = threading.Timer(timeout, proc.kill); killer.start()
+    try:
+        for line in proc.stdout:
+            try: item = parse(json.loads(line))
+            except Exception: continue
+            if item.get("url"): emit(item)
+    finally:
+        killer.cancel()
+        proc.stdout.close()
+        if proc.poll() is None: proc.kill()
+        proc.wait()
+
+def stream_social(cfg, maxsize=200):
+    """Run every configured social search concurrently, yielding items as they stream in."""
+    scfg = cfg.get("social",{})
+    jobs = [(scraper, q, scfg.get("max_results",{}).get(key, n), parse)
+            for key, (scraper, n, parse) in SOURCES.items() for q in scfg.get(key,[])]
+    if not jobs: return
+    out = queue.Queue(maxsize=maxsize)  # bounded: a slow consumer pauses the readers
+    done = object()
+    def job(scraper, q, n, parse):
+        try: run_search(scraper, q, n, parse, out.put, timeout=scfg.get("timeout",60))
+        finally: out.put(done)
+    with ThreadPoolExecutor(max_workers=max(1, min(scfg.get("workers",4), len(jobs))), thread_name_prefix="social") as pool:
+        for j in jobs: pool.submit(job, *j)
+        remaining = len(jobs)
+        while remaining:
+            item = out.get()
+            if item is done: remaining -= 1
+            else: yield item
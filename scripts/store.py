@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+import os, json, sqlite3, hashlib, threading
+from columns import ArticleTable, iter_json_array, write_json_array
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles(
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    content_hash TEXT,
+    simhash TEXT,
+    date TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS articles_url ON articles(url);
+CREATE INDEX IF NOT EXISTS articles_content_hash ON articles(content_hash);
+CREATE INDEX IF NOT EXISTS articles_date ON articles(date);
+CREATE TABLE IF NOT EXISTS aggregates(
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY(kind, key)
+);
+CREATE INDEX IF NOT EXISTS aggregates_rank ON aggregates(kind, count);
+CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS archived(
+    id TEXT PRIMARY KEY,
+    year TEXT NOT NULL,
+    url TEXT,
+    content_hash TEXT,
+    simhash TEXT
+);
+"""
+ARCHIVED_INDEXES = """
+CREATE INDEX IF NOT EXISTS archived_url ON archived(url);
+CREATE INDEX IF NOT EXISTS archived_content_hash ON archived(content_hash);
+"""
+
+# aggregate kind -> article field whose values it counts
+AGGREGATES = {"theme": "tags", "solution": "solutions"}
+
+def fingerprint(path):
+    """sha256 of a file's bytes, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""): h.update(chunk)
+    return h.hexdigest()
+
+class ArticleStore:
+    """SQLite system of record for articles; articles.json is exported from here.
+
+    Each live article is kept whole as JSON in `doc`, with the fields we look things up by broken
+    out into indexed columns. Once its year goes to a write-once archive (retention.py) only the
+    url, content_hash and simhash stay behind in `archived`, for dedupe; the aggregates keep
+    counting it. Writes happen in transactions, so a crash leaves either the old or the new state
+    on disk, never a half-written file.
+
+    The database is a cache of articles.json plus the year archives, not committed: a missing or
+    lost one is rebuilt from them by import_json() and import_archived(), and a stale one restored
+    from the Actions cache catches up the same way.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        cols = {r[1] for r in self.db.execute("PRAGMA table_info(archived)")}
+        if "url" not in cols:  # archived used to list ids of rows still kept in full
+            with self.db:
+                for c in ("url", "content_hash", "simhash"): self.db.execute(f"ALTER TABLE archived ADD COLUMN {c} TEXT")
+                self.db.execute("UPDATE archived SET " + ", ".join(f"{c}=(SELECT {c} FROM articles WHERE articles.id=archived.id)"
+                                                                  for c in ("url", "content_hash", "simhash")))
+                self.db.execute("DELETE FROM articles WHERE id IN (SELECT id FROM archived)")
+        self.db.executescript(ARCHIVED_INDEXES)
+        if self._meta("aggregates") is None: self.rebuild_aggregates()
+
+    def import_json(self, path):
+        """Merge in articles.json unless it is the export this database last wrote or read.
+
+        Covers the first run and a lost database, and also a restored database older than the
+        committed file: articles it lacks are added, ones it has are left alone, and ones it has
+        since archived are not brought back.
+        """
+        if not os.path.exists(path): return 0
+        fp = fingerprint(path)
+        if self._meta("export") == fp: return 0
+        added, batch = 0, []
+        try:
+            for a in iter_json_array(path):  # streamed, so a large legacy file is never held whole
+                batch.append(a)
+                if len(batch) >= 500: added += self.add(self._unarchived(batch)); batch = []
+            added += self.add(self._unarchived(batch))
+        except Exception: return added
+        self._set_meta("export", fp)
+        return added
+
+    def _unarchived(self, articles):
+        with self.lock:
+            return [a for a in articles if not self.db.execute("SELECT 1 FROM archived WHERE id=?", (a["id"],)).fetchone()]
+
+    def import_archived(self, year, articles):
+        """Record an archive file's articles as archived (dedupe keys and aggregates only).
+
+        A stale database may still hold some of them live; those are dropped, already counted.
+        """
+        with self.lock, self.db:
+            for a in articles:
+                cur = self.db.execute("INSERT OR IGNORE INTO archived(id,year,url,content_hash,simhash) VALUES(?,?,?,?,?)",
+                                      (a["id"], year, a["url"], a.get("content_hash"), a.get("simhash")))
+                if cur.rowcount and not self.db.execute("DELETE FROM articles WHERE id=?", (a["id"],)).rowcount:
+                    self._apply(a, +1)
+
+    def count(self):
+        """Every article ever stored, live or archived."""
+        with self.lock: return self.count_live() + self.db.execute("SELECT COUNT(*) FROM archived").fetchone()[0]
+
+    def has_url(self, url):
+        with self.lock:
+            return any(self.db.execute(f"SELECT 1 FROM {t} WHERE url=?", (url,)).fetchone() for t in ("articles", "archived"))
+
+    def has_hash(self, content_hash):
+        with self.lock:
+            return any(self.db.execute(f"SELECT 1 FROM {t} WHERE content_hash=?", (content_hash,)).fetchone()
+                       for t in ("articles", "archived"))
+
+    def get(self, aid):
+        with self.lock: row = self.db.execute("SELECT doc FROM articles WHERE id=?", (aid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, articles):
+        """Insert articles not already present (by id or url) and fold them into the aggregates.
+
+        Returns how many were new.
+        """
+        added = 0
+        with self.lock, self.db:
+            for a in articles:
+                cur = self.db.execute("INSERT OR IGNORE INTO articles(id,url,content_hash,simhash,date,doc) VALUES(?,?,?,?,?,?)",
+                                      (a["id"], a["url"], a.get("content_hash"), a.get("simhash"), a.get("date", ""), json.dumps(a)))
+                if cur.rowcount:
+                    self._apply(a, +1); added += 1
+        return added
+
+    def update_fields(self, updates):
+        """Patch stored documents in place from (id, {field: value}) pairs; indexed columns and
+        aggregates are not touched, so only non-indexed, non-aggregated fields may change."""
+        with self.lock, self.db:
+            for aid, fields in updates:
+                row = self.db.execute("SELECT doc FROM articles WHERE id=?", (aid,)).fetchone()
+                if not row: continue
+                doc = json.loads(row[0]); doc.update(fields)
+                self.db.execute("UPDATE articles SET doc=? WHERE id=?", (json.dumps(doc), aid))
+
+    def remove(self, aid):
+        """Delete an article and take its contribution back out of the aggregates."""
+        with self.lock, self.db:
+            row = self.db.execute("SELECT doc FROM articles WHERE id=?", (aid,)).fetchone()
+            if not row: return False
+            self._apply(json.loads(row[0]), -1)
+            self.db.execute("DELETE FROM articles WHERE id=?", (aid,))
+        return True
+
+    def _apply(self, a, sign):
+        for kind, field in AGGREGATES.items():
+            for key in a.get(field) or []:
+                self.db.execute("INSERT INTO aggregates(kind,key,count) VALUES(?,?,?) "
+                                "ON CONFLICT(kind,key) DO UPDATE SET count=count+excluded.count", (kind, key, sign))
+        if sign < 0: self.db.execute("DELETE FROM aggregates WHERE count<=0")
+
+    def rebuild_aggregates(self):
+        """Recount from scratch; only needed once when upgrading an existing database (which has
+        no archived rows yet, whose counts this could not recover)."""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM aggregates")
+            for (doc,) in self.db.execute("SELECT doc FROM articles").fetchall(): self._apply(json.loads(doc), +1)
+            self.db.execute("INSERT OR REPLACE INTO meta(key,value) VALUES('aggregates','1')")
+
+    def top(self, kind, n=50):
+        with self.lock:
+            return self.db.execute("SELECT key, count FROM aggregates WHERE kind=? ORDER BY count DESC, key LIMIT ?",
+                                   (kind, n)).fetchall()
+
+    def _meta(self, key):
+        with self.lock: row = self.db.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self.lock, self.db: self.db.execute("INSERT OR REPLACE INTO meta(key,value) VALUES(?,?)", (key, value))
+
+    def simhashes(self):
+        with self.lock:
+            return self.db.execute("SELECT id, simhash FROM articles WHERE simhash IS NOT NULL "
+                                   "UNION ALL SELECT id, simhash FROM archived WHERE simhash IS NOT NULL").fetchall()
+
+    def count_simhashes(self):
+        with self.lock:
+            return sum(self.db.execute(f"SELECT COUNT(*) FROM {t} WHERE simhash IS NOT NULL").fetchone()[0]
+                       for t in ("articles", "archived"))
+
+    def archive(self, ids, year):
+        """Drop archived articles' documents, keeping their dedupe keys (and aggregate counts)."""
+        with self.lock, self.db:
+            for aid in ids:
+                self.db.execute("INSERT OR IGNORE INTO archived(id,year,url,content_hash,simhash) "
+                                "SELECT id, ?, url, content_hash, simhash FROM articles WHERE id=?", (year, aid))
+                self.db.execute("DELETE FROM articles WHERE id=?", (aid,))
+
+    def archived_years(self):
+        with self.lock: return [y for (y,) in self.db.execute("SELECT DISTINCT year FROM archived ORDER BY year")]
+
+    def oldest_live_date(self):
+        with self.lock: return self.db.execute("SELECT MIN(date) FROM articles WHERE date!=''").fetchone()[0]
+
+    def count_live(self):
+        with self.lock: return self.db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def iter_articles(self, since=None, until=None, newest_first=True):
+        """Stream live articles in date order, optionally limited to since <= date < until."""
+        where, args = [], []
+        if since: where.append("date>=?"); args.append(since)
+        if until: where.append("date<?"); args.append(until)
+        sql = ("SELECT doc FROM articles" + (" WHERE " + " AND ".join(where) if where else "")
+               + " ORDER BY date " + ("DESC" if newest_first else "ASC"))
+        with self.lock: cur = self.db.execute(sql, args)
+        while True:
+            with self.lock: rows = cur.fetchmany(500)
+            if not rows: return
+            for (doc,) in rows: yield json.loads(doc)
+
+    def export_json(self, path, articles=None):
+        """Write articles (default: every live one, newest first) in the articles.json layout, atomically."""
+        n = write_json_array(path, self.iter_articles() if articles is None else articles)
+        self._set_meta("export", fingerprint(path))  # so the next open doesn't re-import its own export
+        return n
+
+    def table(self, since=None, until=None):
+        """The live articles in [since, until) as a compact ArticleTable, in insertion (newest-first) order."""
+        return ArticleTable.from_articles(self.iter_articles(since, until))
+
+    def close(self):
+        with self.lock: self.db.close()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+MAX_SENTENCES = 200  # per document; long documents rarely put their point after this
+MIN_WORDS = 6  # shorter sentences (headings, captions) can rank but are not picked
+
+def summarise_batch(docs, n=5, damping=0.85, iterations=30, tol=1e-6):
+    """TextRank summaries for many analysed documents (analysis.Doc) at once.
+
+    All sentences in the batch share one TF-IDF matrix built from the documents' own sentence
+    terms, so idf reflects the whole batch, and PageRank runs once over a block-diagonal
+    cosine-similarity graph (sentences only link to sentences of the same document). Returns one
+    summary per document, sentences in original order.
+    """
+    sents, terms, owner = [], [], []
+    for i, d in enumerate(docs):
+        ss = d.sentences()[:MAX_SENTENCES]
+        sents += ss; terms += d.terms[:MAX_SENTENCES]; owner += [i] * len(ss)
+    if not sents: return ["" for _ in docs]
+    owner = np.asarray(owner)
+    try:
+        X = TfidfVectorizer(analyzer=list, sublinear_tf=True, dtype=np.float32).fit_transform(terms)
+    except ValueError:  # nothing but stopwords
+        X = sparse.csr_matrix((len(sents), 1), dtype=np.float32)
+
+    # cosine similarity (rows are l2-normalised), one block per document so documents never link
+    bounds = np.searchsorted(owner, np.arange(len(docs) + 1))
+    S = sparse.block_diag([X[a:b] @ X[a:b].T for a, b in zip(bounds[:-1], bounds[1:]) if b > a], format="csr")
+    S.setdiag(0); S.eliminate_zeros()
+    out_deg = np.asarray(S.sum(axis=1)).ravel()
+    P = sparse.diags(np.divide(1.0, out_deg, out=np.zeros_like(out_deg), where=out_deg > 0)) @ S
+    size = np.bincount(owner, minlength=len(docs))[owner].astype(np.float32)
+    teleport = (1 - damping) / size
+    r = 1.0 / size
+    for _ in range(iterations):
+        nxt = teleport + damping * (P.T @ r)
+        done = np.abs(nxt - r).max() < tol
+        r = nxt
+        if done: break
+
+    words = np.fromiter((s.count(" ") + 1 for s in sents), dtype=np.int32, count=len(sents))
+    r = np.where(words >= MIN_WORDS, r, r - 1.0)  # rank short sentences below every full one
+    order = np.lexsort((-r, owner))  # by text, then best first
+    out = []
+    for i in range(len(docs)):
+        picked = np.sort(order[bounds[i]:bounds[i + 1]][:n])
+        out.append(" ".join(sents[j] for j in picked))
+    return out
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import os, json, time, threading
+from concurrent.futures import ThreadPoolExecutor
+from fetcher import get_session
+from metrics import METRICS
+
+BING_ENDPOINT = "https://api.bing.microsoft.com/v7.0/search"
+
+def bing_search(q, api_key, n=12, endpoint=BING_ENDPOINT):
+    try:
+        r = get_session().get(endpoint,
+            params={"q":q,"count":n,"mkt":"en-GB","setLang":"EN"},
+            headers={"Ocp-Apim-Subscription-Key":api_key}, timeout=20)
+        if r.status_code==200:
+            js=r.json().get("webPages",{}).get("value",[])
+            return [{"name":w["name"],"url":w["url"],"snippet":w.get("snippet","")} for w in js]
+    except Exception: return None
+    return None
+
+class SearchCache:
+    """Query -> results, kept for `ttl` seconds so the daily run doesn't re-buy identical searches."""
+    def __init__(self, path, ttl=20*3600):
+        self.path, self.ttl = path, ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f: self.entries = json.load(f)
+            except Exception: self.entries = {}
+
+    def get(self, key):
+        with self.lock:
+            e = self.entries.get(key)
+            hit = bool(e) and time.time() - e["ts"] <= self.ttl
+        METRICS.cache("search", hit)
+        return e["results"] if hit else None
+
+    def put(self, key, results):
+        with self.lock: self.entries[key] = {"ts": time.time(), "results": results}
+
+    def save(self):
+        now = time.time()
+        with self.lock:
+            live = {k: e for k, e in self.entries.items() if now - e["ts"] <= self.ttl}
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f: json.dump(live, f)
+            os.replace(tmp, self.path)
+
+def search_all(queries, api_key, cache, n=15, workers=4, endpoint=BING_ENDPOINT):
+    """Run queries concurrently (cache first) and yield each result URL once across all queries."""
+    def one(q):
+        key = f"{endpoint}|{n}|{q}"
+        hit = cache.get(key)
+        if hit is not None: return hit
+        res = bing_search(q, api_key, n=n, endpoint=endpoint)
+        if res is None: return []  # failures are not cached
+        cache.put(key, res)
+        return res
+    if not queries: return
+    seen = set()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(queries))), thread_name_prefix="search") as pool:
+        for results in pool.map(one, queries):
+            for r in results:
+                if r["url"] not in seen:
+                    seen.add(r["url"]); yield r
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import os, json, heapq
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+TOP_ARTICLES = 10
+KEEP_SOLUTIONS = 200  # solution counts kept per digest, enough for the next week's "recurring" check
+
+def window_end(now=None):
+    """Digests cover whole UTC days: the 7 days before today's midnight."""
+    now = now or datetime.now(timezone.utc)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def compute(store, start, end):
+    """Digest for articles dated [start, end); reads only that range through the store's date index."""
+    top, themes, solutions, n = [], Counter(), Counter(), 0
+    for i, a in enumerate(store.iter_articles(since=start.isoformat(), until=end.isoformat())):
+        n += 1
+        themes.update(set(a.get("tags") or []))
+        solutions.update(set(a.get("solutions") or []))
+        entry = (a.get("relevance_score") or 0, -i, {k: a.get(k) for k in ("id", "title", "url", "source", "date", "relevance_score", "summary")})
+        if len(top) < TOP_ARTICLES: heapq.heappush(top, entry)
+        else: heapq.heappushpop(top, entry)
+    return {"start": start.date().isoformat(), "end": end.date().isoformat(), "count": n,
+            "top": [e[2] for e in sorted(top, reverse=True)],
+            "themes": dict(themes.most_common()),
+            "solutions": dict(solutions.most_common(KEEP_SOLUTIONS))}
+
+class WeeklyDigests:
+    """7-day digests cached as reports/weekly/<end date>.json.
+
+    A window that has ended is complete, so its digest is computed once and then only ever read;
+    each new digest compares itself with the cached one before it for new and rising themes.
+    """
+    def __init__(self, store, reports_dir):
+        self.store = store
+        self.dir = os.path.join(reports_dir, "weekly")
+        os.makedirs(self.dir, exist_ok=True)
+
+    def path(self, end): return os.path.join(self.dir, end.date().isoformat() + ".json")
+
+    def get(self, end):
+        p = self.path(end)
+        if os.path.exists(p):
+            with open(p, "r") as f: return json.load(f)
+        d = compute(self.store, end - timedelta(days=7), end)
+        with open(p + ".tmp", "w") as f: json.dump(d, f, indent=2)
+        os.replace(p + ".tmp", p)
+        return d
+
+    def digest(self, end):
+        """The digest ending at `end` with its comparison against the week before."""
+        cur, prev = self.get(end), self.get(end - timedelta(days=7))
+        pt, ps = prev["themes"], prev["solutions"]
+        cur["new_themes"] = sorted((k for k in cur["themes"] if k not in pt), key=lambda k: -cur["themes"][k])
+        cur["rising_themes"] = sorted(({"name": k, "count": c, "previous": pt[k]} for k, c in cur["themes"].items()
+                                       if k in pt and c > pt[k]), key=lambda t: (t["previous"] - t["count"], t["name"]))  # biggest gain first
+        cur["recurring_solutions"] = [{"text": k, "count": c, "previous": ps.get(k, 0)} for k, c in cur["solutions"].items()
+                                      if c > 1 or k in ps]
+        return cur
+
+def to_markdown(d):
+    last = (datetime.fromisoformat(d["end"]) - timedelta(days=1)).date().isoformat()  # `end` is exclusive
+    lines = [f"# Weekly digest: {d['start']} to {last}", "", f"{d['count']} articles this week.", "", "## Top articles", ""]
+    for a in d["top"]:
+        lines.append(f"- **[{a.get('title') or a['url']}]({a['url']})** — {a.get('source') or ''}, {(a.get('date') or '')[:10]}, "
+                     f"score {a.get('relevance_score') or 0:.2f}")
+        if a.get("summary"): lines.append(f"  {' '.join(a['summary'].split())[:400]}")
+    if not d["top"]: lines.append("No articles this week.")
+    lines += ["", "## Themes", "", "| Theme | This week | Last week |", "|---|---|---|"]
+    for k in d["new_themes"][:10]: lines.append(f"| {k} (new) | {d['themes'][k]} | 0 |")
+    for t in d["rising_themes"][:10]: lines.append(f"| {t['name']} ↑ | {t['count']} | {t['previous']} |")
+    lines += ["", "## Recurring solutions", ""]
+    for s in d["recurring_solutions"][:10]:
+        lines.append(f"- {s['text']} ({s['count']} this week" + (f", {s['previous']} last week)" if s["previous"] else ")"))
+    if not d["recurring_solutions"]: lines.append("None this week.")
+    return "\n".join(lines) + "\n"
+
+def write_weekly(store, reports_dir, now=None):
+    """Write reports/weekly_summary.md for the last 7 full days; returns its path."""
+    d = WeeklyDigests(store, reports_dir).digest(window_end(now))
+    path = os.path.join(reports_dir, "weekly_summary.md")
+    with open(path, "w") as f: f.write(to_markdown(d))
+    return path
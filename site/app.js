@@ -1 +1 @@
-async function loadJSON(p){const r=await fetch(p,{cache:'no-store'});return r.json()}const state={articles:[],themes:null,sortKey:'date',sortDir:'desc',search:'',tag:'',onlyRecommended:false};function fmtDate(i){const d=new Date(i);return d.toLocaleDateString(undefined,{year:'numeric',month:'short',day:'2-digit'})}function setSort(k){if(state.sortKey===k){state.sortDir=state.sortDir==='asc'?'desc':'asc'}else{state.sortKey=k;state.sortDir='desc'};renderTable()}function getLiked(){try{return new Set(JSON.parse(localStorage.getItem('likedArticles')||'[]'))}catch(e){return new Set()}}function toggleLike(id){const s=getLiked();s.has(id)?s.delete(id):s.add(id);localStorage.setItem('likedArticles',JSON.stringify([...s]));renderTable()}function renderCharts(){if(!state.themes)return;const tc=state.themes.themes.slice(0,12),sc=state.themes.top_solutions.slice(0,12);new Chart(document.getElementById('themesChart'),{type:'bar',data:{labels:tc.map(x=>x.name),datasets:[{label:'Theme mentions',data:tc.map(x=>x.count)}]},options:{plugins:{legend:{display:false}}}});new Chart(document.getElementById('solutionsChart'),{type:'bar',data:{labels:sc.map(x=>x.text.slice(0,30)),datasets:[{label:'Solution mentions',data:sc.map(x=>x.count)}]},options:{plugins:{legend:{display:false}}}})}function renderTable(){const tb=document.querySelector('#articlesTable tbody');tb.innerHTML='';const liked=getLiked(),thr=0.35;let rows=state.articles.slice();if(state.search){const q=state.search.toLowerCase();rows=rows.filter(a=>(a.title||'').toLowerCase().includes(q)||(a.source||'').toLowerCase().includes(q)||(a.tags||[]).some(t=>t.toLowerCase().includes(q)))}if(state.tag){rows=rows.filter(a=>(a.tags||[]).includes(state.tag))}if(state.onlyRecommended){rows=rows.filter(a=>(a.relevance_score||0)>=thr)}rows.sort((a,b)=>{let va=a[state.sortKey],vb=b[state.sortKey];if(state.sortKey==='date'){va=new Date(va).getTime();vb=new Date(vb).getTime()}return va<vb?(state.sortDir==='asc'?-1:1):va>vb?(state.sortDir==='asc'?1:-1):0});for(const a of rows){const tr=document.createElement('tr');tr.innerHTML=`<td>${fmtDate(a.date)}</td><td><a href='${a.url}' target='_blank' rel='noopener'>${a.title||'(untitled)'}</a><div class='source'>${a.summary||''}</div></td><td>${a.source||''}</td><td>${(a.relevance_score??0).toFixed(2)}</td><td>${(a.tags||[]).map(t=>`<span class='badge'>${t}</span>`).join('')}</td><td class='star ${liked.has(a.id)?'on':''}' title='Like to steer future ranking'>★</td>`;tr.querySelector('.star').addEventListener('click',()=>toggleLike(a.id));tb.appendChild(tr)}}async function init(){const[articles,themes]=await Promise.all([loadJSON('./articles.json').catch(()=>loadJSON('./articles.sample.json')),loadJSON('./themes.json').catch(()=>loadJSON('./themes.sample.json'))]);state.articles=articles;state.themes=themes;const counts={};for(const a of articles){for(const t of(a.tags||[])){counts[t]=(counts[t]||0)+1}}const tagFilter=document.getElementById('tagFilter');Object.entries(counts).sort((a,b)=>b[1]-a[1]).forEach(([t,c])=>{const opt=document.createElement('option');opt.value=t;opt.textContent=`${t} (${c})`;tagFilter.appendChild(opt)});document.getElementById('search').addEventListener('input',e=>{state.search=e.target.value;renderTable()});tagFilter.addEventListener('change',e=>{state.tag=e.target.value;renderTable()});document.getElementById('recoFilter').addEventListener('change',e=>{state.onlyRecommended=e.target.value==='recommended';renderTable()});document.querySelectorAll('th[data-key]').forEach(th=>th.addEventListener('click',()=>setSort(th.dataset.key)));renderCharts();renderTable()}init();
\ No newline at end of file
+async function loadJSON(p,cache){const r=await fetch(p,{cache:cache||'no-store'});if(!r.ok)throw new Error(p);return r.json()}const state={articles:[],themes:null,sortKey:'date',sortDir:'desc',search:'',tag:'',onlyRecommended:false,manifest:null,loaded:0,index:null};const MAX_ROWS=500;function prepIndex(parts){const dec=l=>{const out=[];for(const[g,off]of l){let s=off;for(const d of g)out.push(s+=d)}return out},post={},tags={};for(const[ix,off]of parts){for(const k in ix.tokens)(post[k]=post[k]||[]).push([ix.tokens[k],off]);for(const k in ix.tags)(tags[k]=tags[k]||[]).push([ix.tags[k],off])}return{vocab:Object.keys(post).sort(),post,tags,dec,cache:new Map()}}function postings(ix,map,k){const key=(map===ix.tags?'#':'')+k;let p=ix.cache.get(key);if(!p){p=ix.dec(map[k]||[]);ix.cache.set(key,p)}return p}function prefixIds(ix,q){let lo=0,hi=ix.vocab.length;while(lo<hi){const m=(lo+hi)>>1;ix.vocab[m]<q?lo=m+1:hi=m}const out=new Set();for(let i=lo;i<ix.vocab.length&&ix.vocab[i].startsWith(q);i++){for(const d of postings(ix,ix.post,ix.vocab[i]))out.add(d)}return out}function intersect(a,b){if(!a)return b;const[s,l]=a.size<b.size?[a,b]:[b,a],out=new Set();for(const d of s)if(l.has(d))out.add(d);return out}function matchIds(){const ix=state.index;if(!ix||(!state.search&&!state.tag))return null;let hits=null;for(const q of state.search.toLowerCase().match(/[a-z0-9&]+/g)||[]){hits=intersect(hits,prefixIds(ix,q));if(!hits.size)return hits}if(state.tag)hits=intersect(hits,new Set(postings(ix,ix.tags,state.tag)));return hits||new Set(state.articles.keys())}function fmtDate(i){const d=new Date(i);return d.toLocaleDateString(undefined,{year:'numeric',month:'short',day:'2-digit'})}function setSort(k){if(state.sortKey===k){state.sortDir=state.sortDir==='asc'?'desc':'asc'}else{state.sortKey=k;state.sortDir='desc'};renderTable()}function getLiked(){try{return new Set(JSON.parse(localStorage.getItem('likedArticles')||'[]'))}catch(e){return new Set()}}function toggleLike(id){const s=getLiked();s.has(id)?s.delete(id):s.add(id);localStorage.setItem('likedArticles',JSON.stringify([...s]));renderTable()}function renderCharts(){if(!state.themes)return;const tc=state.themes.themes.slice(0,12),sc=state.themes.top_solutions.slice(0,12);new Chart(document.getElementById('themesChart'),{type:'bar',data:{labels:tc.map(x=>x.name),datasets:[{label:'Theme mentions',data:tc.map(x=>x.count)}]},options:{plugins:{legend:{display:false}}}});new Chart(document.getElementById('solutionsChart'),{type:'bar',data:{labels:sc.map(x=>x.text.slice(0,30)),datasets:[{label:'Solution mentions',data:sc.map(x=>x.count)}]},options:{plugins:{legend:{display:false}}}})}function renderTable(){const tb=document.querySelector('#articlesTable tbody');tb.innerHTML='';const liked=getLiked(),thr=0.35;let rows;const hits=matchIds();if(hits){rows=[];for(const i of hits){if(i<state.articles.length)rows.push(state.articles[i])}}else{rows=state.articles.slice();if(state.search){const q=state.search.toLowerCase();rows=rows.filter(a=>(a.title||'').toLowerCase().includes(q)||(a.source||'').toLowerCase().includes(q)||(a.tags||[]).some(t=>t.toLowerCase().includes(q)))}if(state.tag){rows=rows.filter(a=>(a.tags||[]).includes(state.tag))}}if(state.onlyRecommended){rows=rows.filter(a=>(a.relevance_score||0)>=thr)}rows.sort((a,b)=>{let va=a[state.sortKey],vb=b[state.sortKey];if(state.sortKey==='date'){va=new Date(va).getTime();vb=new Date(vb).getTime()}return va<vb?(state.sortDir==='asc'?-1:1):va>vb?(state.sortDir==='asc'?1:-1):0});const frag=document.createDocumentFragment();for(const a of rows.slice(0,MAX_ROWS)){const tr=document.createElement('tr');tr.innerHTML=`<td>${fmtDate(a.date)}</td><td><a href='${a.url}' target='_blank' rel='noopener'>${a.title||'(untitled)'}</a><div class='source'>${a.summary||''}</div></td><td>${a.source||''}</td><td>${(a.relevance_score??0).toFixed(2)}</td><td>${(a.tags||[]).map(t=>`<span class='badge'>${t}</span>`).join('')}</td><td class='star ${liked.has(a.id)?'on':''}' title='Like to steer future ranking'>★</td>`;tr.querySelector('.star').addEventListener('click',()=>toggleLike(a.id));frag.appendChild(tr)}if(rows.length>MAX_ROWS){const tr=document.createElement('tr');tr.innerHTML=`<td colspan=6 class='source'>Showing ${MAX_ROWS} of ${rows.length} — refine the search to see more</td>`;frag.appendChild(tr)}tb.appendChild(frag)}async function loadShard(){const s=state.manifest.shards[state.loaded];state.articles=state.articles.concat(await loadJSON('./data/'+s.file,'force-cache'));state.loaded++}async function loadOlder(){while(state.manifest&&state.loaded<state.manifest.shards.length){await loadShard();renderTable()}}async function loadArticles(){try{state.manifest=await loadJSON('./data/manifest.json','no-cache');let off=0;const ix=Promise.all(state.manifest.shards.map(s=>{const o=off;off+=s.count;return loadJSON('./data/'+s.index.file,'force-cache').then(x=>[x,o])})).then(prepIndex).catch(()=>null);if(state.manifest.shards.length)await loadShard();state.index=await ix;return state.manifest.tags.map(t=>[t.name,t.count])}catch(e){state.manifest=null;state.articles=await loadJSON('./articles.json').catch(()=>loadJSON('./articles.sample.json'));const counts={};for(const a of state.articles){for(const t of(a.tags||[])){counts[t]=(counts[t]||0)+1}}return Object.entries(counts).sort((a,b)=>b[1]-a[1])}}async function init(){const[tagCounts,themes]=await Promise.all([loadArticles(),loadJSON('./themes.json').catch(()=>loadJSON('./themes.sample.json'))]);state.themes=themes;const tagFilter=document.getElementById('tagFilter');tagCounts.forEach(([t,c])=>{const opt=document.createElement('option');opt.value=t;opt.textContent=`${t} (${c})`;tagFilter.appendChild(opt)});document.getElementById('search').addEventListener('input',e=>{state.search=e.target.value;renderTable()});tagFilter.addEventListener('change',e=>{state.tag=e.target.value;renderTable()});document.getElementById('recoFilter').addEventListener('change',e=>{state.onlyRecommended=e.target.value==='recommended';renderTable()});document.querySelectorAll('th[data-key]').forEach(th=>th.addEventListener('click',()=>setSort(th.dataset.key)));renderCharts();renderTable();loadOlder()}init();
\ No newline at end of file
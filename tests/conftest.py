@@ -0,0 +1,4 @@
+import os, sys
+
+# the scripts import each other by bare module name, as they do when run from scripts/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
@@ -0,0 +1,106 @@
+"""HostBook and fetch_many against a stubbed session and clock: no network, no sleeping."""
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+import fetcher
+from fetcher import HostBook, fetch_many, _download
+
+class Clock:
+    def __init__(self): self.now = 1_000_000.0
+    def time(self): return self.now
+    def monotonic(self): return self.now
+    def sleep(self, s): self.now += s
+
+class Response:
+    def __init__(self, status=200, text="<html>ok</html>", headers=None):
+        self.status_code, self.text, self.headers = status, text, CaseInsensitiveDict(headers or {})
+        self.content = text.encode("utf-8")
+
+class Session:
+    """Answers each URL from a list of canned responses (the last one repeats); records requests."""
+    def __init__(self, routes): self.routes, self.calls = routes, []
+    def get(self, url, **kw):
+        self.calls.append(url)
+        answers = self.routes.get(url, [Response(404, "")])
+        r = answers.pop(0) if len(answers) > 1 else answers[0]
+        if isinstance(r, Exception): raise r
+        return r
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(fetcher, "time", c)
+    return c
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(routes):
+        s = Session(routes)
+        monkeypatch.setattr(fetcher, "_session", s)
+        return s
+    return install
+
+DOWN = requests.ConnectionError("refused")
+
+def test_breaker_opens_after_n_failures(clock, session):
+    s = session({"http://a.test/x": [DOWN]})
+    hb = HostBook(failures=3, cooldown=60, robots=False)
+    for _ in range(2):
+        assert _download("http://a.test/x", 5, hosts=hb) == ("retry", None)
+        assert hb.state("a.test", clock.time()) == "ok"
+    _download("http://a.test/x", 5, hosts=hb)
+    assert hb.state("a.test", clock.time()) == "skip"
+    assert hb.why("http://a.test/y") == "host unavailable"
+    # while open, the host's URLs come straight back without a request
+    n = len(s.calls)
+    assert list(fetch_many(["http://a.test/y"], hosts=hb)) == [("http://a.test/y", None)]
+    assert len(s.calls) == n
+
+def test_probe_success_closes_breaker(clock, session):
+    s = session({"http://a.test/x": [DOWN, DOWN, DOWN, Response()]})
+    hb = HostBook(failures=3, cooldown=60, robots=False)
+    for _ in range(3): _download("http://a.test/x", 5, hosts=hb)
+    clock.sleep(61)
+    assert hb.state("a.test", clock.time()) == "probe"
+    assert hb.limit("a.test", 4) == 1
+    assert list(fetch_many(["http://a.test/x"], hosts=hb)) == [("http://a.test/x", "<html>ok</html>")]
+    assert hb.state("a.test", clock.time()) == "ok"
+    assert hb.hosts["a.test"]["trips"] == 0 and len(s.calls) == 4
+
+def test_probe_failure_reopens_for_longer(clock, session):
+    session({"http://a.test/x": [DOWN]})
+    hb = HostBook(failures=3, cooldown=60, max_cooldown=100, robots=False)
+    for _ in range(3): _download("http://a.test/x", 5, hosts=hb)
+    assert hb.hosts["a.test"]["open_until"] == clock.time() + 60
+    clock.sleep(61)
+    assert hb.state("a.test", clock.time()) == "probe"
+    _download("http://a.test/x", 5, hosts=hb)
+    assert hb.state("a.test", clock.time()) == "skip"
+    assert hb.hosts["a.test"]["open_until"] == clock.time() + 100  # 2 x 60, capped at max_cooldown
+
+def test_retry_after_beyond_max_wait_defers_the_host(clock, session):
+    s = session({"http://a.test/x": [Response(429, "", {"Retry-After": "600"}), Response()]})
+    hb = HostBook(max_wait=120, robots=False)
+    assert list(fetch_many(["http://a.test/x", "http://a.test/z"], workers=1, per_host=1, hosts=hb)) == \
+        [("http://a.test/x", None), ("http://a.test/z", None)]
+    assert s.calls == ["http://a.test/x"]  # neither retried nor the next URL tried
+    assert hb.why("http://a.test/x") == "rate limited"
+    assert hb.hosts["a.test"]["fails"] == 0  # throttling, not an outage
+    clock.sleep(601)
+    assert hb.state("a.test", clock.time()) == "ok"
+
+def test_short_retry_after_is_honoured(clock, session):
+    session({"http://a.test/x": [Response(429, "", {"Retry-After": "30"}), Response()]})
+    hb = HostBook(max_wait=120, robots=False)
+    assert _download("http://a.test/x", 5, hosts=hb) == ("retry", 30.0)
+    assert hb.state("a.test", clock.time()) == "wait"
+    assert hb.ready_at("a.test") == clock.time() + 30
+
+def test_robots_disallow(clock, session):
+    s = session({"http://a.test/robots.txt": [Response(200, "User-agent: *\nDisallow: /private/\n")],
+                 "http://a.test/public": [Response()], "http://a.test/private/x": [Response()]})
+    hb = HostBook()
+    assert _download("http://a.test/private/x", 5, hosts=hb) == ("fail", None)
+    assert hb.why("http://a.test/private/x") == "robots.txt"
+    assert _download("http://a.test/public", 5, hosts=hb) == ("ok", "<html>ok</html>")
+    assert s.calls == ["http://a.test/robots.txt", "http://a.test/public"]  # robots.txt read once, page never asked for